@@ -17,10 +17,8 @@
 # @details
 
 # General
-import os, sys
-import numpy as np
-import time
-from config import DEBUG, MAX_STIM_EL_MAXWELL, MAX_PARAMS_STIM_MAXWELL
+import sys
+from config import DEBUG
 
 # pyqt
 from PyQt5.QtWidgets    import (QApplication)
@@ -17,19 +17,22 @@
 # > **01 Jul 2024** : add file header (RB)
 # > **01 Jul 2024** : add functions to load and get from config files (RB)
 
+import logging
 import math
+from functools import lru_cache
 from typing import (
     Iterable,
     List,
     Optional,
     Protocol,
+    Set,
     Tuple,
-    runtime_checkable,
 )
 
 import maxlab
 import maxlab.util
 import numpy as np
+from maxlab.apicomm import api_context
 from maxlab.chip import (
     Array,
     Core,
@@ -44,14 +47,18 @@ from maxwellio.stimulation import (
     Stimulator,
 )
 
+_logger = logging.getLogger(__name__)
+
 N_MAP_COLUMNS = 220
 """Number of columns in the MaxWell electrode array."""
 
 N_MAP_ROWS = 120
 """Number of rows in the MaxWell electrode array."""
 
+ELECTRODE_DTYPE = np.int32
+"""Data type of electrode IDs (at most N_MAP_ROWS * N_MAP_COLUMNS)."""
+
 
-@runtime_checkable
 class ElectrodeArray(Protocol):
     """Protocol for wrapping the functionality of MaxLab's electrode array
     related classes.
@@ -198,6 +205,34 @@ class ElectrodeArray(Protocol):
         """
         ...
 
+    def power_up_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        """Wrap `maxlab.send()` for power up of several units over a single
+        API connection.
+
+        Parameters
+        ----------
+        units : Iterable[str]
+            Unit numbers.
+        """
+        ...
+
+    def power_down_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        """Wrap `maxlab.send()` for power down of several units over a single
+        API connection.
+
+        Parameters
+        ----------
+        units : Iterable[str]
+            Unit numbers.
+        """
+        ...
+
     def load_config(
         self,
         fpath: str,
@@ -227,6 +262,12 @@ class ElectrodeArray(Protocol):
 class EmptyElectrodeArray(ElectrodeArray):
     """Empty implementation of `ElectrodeArray`."""
 
+    def __init__(self) -> None:
+        """Initialize a new instance."""
+
+        super().__init__()
+        self._config: Optional[Config] = None
+
     def initialize(self) -> None:
         pass
 
@@ -296,6 +337,18 @@ class EmptyElectrodeArray(ElectrodeArray):
     ) -> None:
         pass
 
+    def power_up_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        pass
+
+    def power_down_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        pass
+
     def load_config(
         self,
         fpath: str,
@@ -305,7 +358,10 @@ class EmptyElectrodeArray(ElectrodeArray):
     def get_config(
         self,
     ) -> Config:
-        return Config("0(5387)1872.5/420;1(11362)2485/892.5;")
+        # The dummy config never changes, so it is parsed only once
+        if self._config is None:
+            self._config = Config("0(5387)1872.5/420;1(11362)2485/892.5;")
+        return self._config
 
 
 class MockElectrodeArray(ElectrodeArray):
@@ -315,9 +371,11 @@ class MockElectrodeArray(ElectrodeArray):
         """Initialize a new instance."""
 
         super().__init__()
-        self._selected_electrodes = []
-        self._connected_stimulation_electrodes = []
-        self._power_up_stimulation_units = []
+        self._selected_electrodes: Set[int] = set()
+        # Kept as a list: the position of an electrode is its mock unit
+        self._connected_stimulation_electrodes: List[int] = []
+        self._power_up_stimulation_units: Set[str] = set()
+        self._config: Optional[Config] = None
 
     def initialize(self) -> None:
         pass
@@ -338,19 +396,19 @@ class MockElectrodeArray(ElectrodeArray):
         pass
 
     def clear_selected_electrodes(self) -> None:
-        self._selected_electrodes = []
+        self._selected_electrodes.clear()
 
     def select_electrodes(
         self,
         electrodes: Iterable[int],
     ) -> None:
-        self._selected_electrodes.extend(electrodes)
+        self._selected_electrodes.update(electrodes)
 
     def select_stimulation_electrodes(
         self,
         electrodes: Iterable[int],
     ) -> None:
-        self._selected_electrodes.extend(electrodes)
+        self._selected_electrodes.update(electrodes)
 
     def route(self) -> None:
         pass
@@ -372,8 +430,10 @@ class MockElectrodeArray(ElectrodeArray):
         self,
         electrode: int,
     ) -> None:
-        if electrode in self._connected_stimulation_electrodes:
+        try:
             self._connected_stimulation_electrodes.remove(electrode)
+        except ValueError:
+            pass
 
     def download(self) -> None:
         pass
@@ -382,14 +442,25 @@ class MockElectrodeArray(ElectrodeArray):
         self,
         unit: str,
     ) -> None:
-        self._power_up_stimulation_units.append(unit)
+        self._power_up_stimulation_units.add(unit)
 
     def power_down_stimulation_unit(
         self,
         unit: str,
     ) -> None:
-        if unit in self._power_up_stimulation_units:
-            self._power_up_stimulation_units.remove(unit)
+        self._power_up_stimulation_units.discard(unit)
+
+    def power_up_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        self._power_up_stimulation_units.update(units)
+
+    def power_down_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        self._power_up_stimulation_units.difference_update(units)
 
     # TODO: implement mock load config
     def load_config(
@@ -403,18 +474,21 @@ class MockElectrodeArray(ElectrodeArray):
     ) -> Config:
         """Generate dummy config (not hardware coherent)
         format: channel_id(electrode_id)x_pos/y_pos;"""
-        map_list = []
-        for channel_id in range(1024):
-            # electrode_id = random.randint(0, 220*120-1)
-            electrode_id = channel_id
-            x_pos = electrode_id % 220
-            y_pos = electrode_id // 220
-            chan_mapping = (
-                f"{channel_id}({electrode_id}){x_pos:.1f}/{y_pos:.1f}"
+        # The dummy config never changes, so it is built only once
+        if self._config is not None:
+            return self._config
+
+        # electrode_id = random.randint(0, 220*120-1)
+        electrode_ids = np.arange(1024)
+        y_pos, x_pos = np.divmod(electrode_ids, 220)
+        mock_config = ";".join(
+            f"{electrode_id}({electrode_id}){x}.0/{y}.0"
+            for electrode_id, x, y in zip(
+                electrode_ids.tolist(), x_pos.tolist(), y_pos.tolist()
             )
-            map_list.append(chan_mapping)
-        mock_config = ";".join(map_list)
-        return Config(mock_config)
+        )
+        self._config = Config(mock_config)
+        return self._config
 
 
 class MaxWellElectrodeArray(ElectrodeArray):
@@ -500,6 +574,48 @@ class MaxWellElectrodeArray(ElectrodeArray):
         stimulation_unit = StimulationUnit(unit)
         maxlab.send(stimulation_unit)
 
+    def power_up_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        stimulation_units: List[StimulationUnit] = []
+        for unit in units:
+            stimulation_unit = StimulationUnit(unit)
+            stimulation_unit.power_up(True)
+            stimulation_unit.connect(True)
+            stimulation_units.append(stimulation_unit)
+
+        self._send_stimulation_units(stimulation_units)
+
+    def power_down_stimulation_units(
+        self,
+        units: Iterable[str],
+    ) -> None:
+        self._send_stimulation_units([StimulationUnit(unit) for unit in units])
+
+    def _send_stimulation_units(
+        self,
+        stimulation_units: List[StimulationUnit],
+    ) -> None:
+        # Same as `maxlab.send()` per unit, but without reconnecting to the
+        # API for each of them. `api_context` swallows errors, so the units
+        # left unsent by a failure are sent one by one as `maxlab.send()`
+        # would, each failing on its own
+        n_sent = 0
+        with api_context() as api:
+            for stimulation_unit in stimulation_units:
+                api.send(stimulation_unit.set())
+                n_sent += 1
+
+        if unsent := stimulation_units[n_sent:]:
+            _logger.warning(
+                "Stimulation units %s not sent over the shared API"
+                " connection, sending them one by one",
+                [stimulation_unit.unit_no for stimulation_unit in unsent],
+            )
+            for stimulation_unit in unsent:
+                maxlab.send(stimulation_unit)
+
     def load_config(
         self,
         fpath: str,
@@ -527,31 +643,42 @@ class ElectrodeMap:
             A two-dimensional array of electrodes.
         """
 
-        self._array_2d = array_2d
-        self._array_1d = self._array_2d.ravel()
+        # Read-only private copy, so that the maps can be shared (see
+        # `_create_sparse_electrode_map`) without the lookup table going stale,
+        # even if the caller later modifies its own array
+        self._array_2d = np.array(array_2d, dtype=ELECTRODE_DTYPE, copy=True)
+        self._array_2d.setflags(write=False)
+        self._array_1d = self._array_2d.reshape(-1)
+        self._array_1d.setflags(write=False)
         self._n_rows = len(array_2d)
         self._n_columns = len(array_2d[0])
         self._n_channels = len(self._array_1d)
+        # Electrode ID -> channel lookup table, keeping the first channel of
+        # any duplicated electrode ID
+        electrodes = self._array_1d.tolist()
+        self._electrode_to_channel = dict(
+            zip(reversed(electrodes), reversed(range(self._n_channels)))
+        )
 
     @property
-    def array_2d(self) -> NDArray[np.int_]:
+    def array_2d(self) -> NDArray[np.int32]:
         """Get the two-dimensional array of electrodes.
 
         Returns
         -------
-        NDArray[np.int_]
+        NDArray[np.int32]
             The two-dimensional array of electrodes.
         """
 
         return self._array_2d
 
     @property
-    def array_1d(self) -> NDArray[np.int_]:
+    def array_1d(self) -> NDArray[np.int32]:
         """Get the one-dimensional array of electrodes.
 
         Returns
         -------
-        NDArray[np.int_]
+        NDArray[np.int32]
             The one-dimensional array of electrodes.
         """
 
@@ -617,7 +744,8 @@ class ElectrodeMap:
 
         if self._n_channels <= channel:
             raise ValueError(f"Out of range: {self._n_channels}")
-        return (channel % self._n_columns, channel // self._n_columns)
+        y, x = divmod(channel, self._n_columns)
+        return (x, y)
 
     def get_channel_by_x_y(
         self,
@@ -670,11 +798,11 @@ class ElectrodeMap:
             `None`.
         """
 
-        out = np.where(self._array_2d == electrode)
-        if len(out[0]) == 0:
+        channel = self.get_channel_by_electrode(electrode)
+        if channel is None:
             return None
-        # x, y
-        return out[1][0], out[0][0]
+        y, x = divmod(channel, self._n_columns)
+        return (x, y)
 
     def get_electrode_by_x_y(
         self,
@@ -720,8 +848,37 @@ class ElectrodeMap:
             When `channel` exceeds `n_channels`.
         """
 
-        x, y = self.get_x_y_by_channel(channel)
-        return self.get_electrode_by_x_y(x, y)
+        if self._n_channels <= channel:
+            raise ValueError(f"Out of range: {self._n_channels}")
+        # The channel number is the index in the flattened array
+        return self._array_1d[channel]
+
+    def get_electrodes_by_channels(
+        self,
+        channels: Iterable[int],
+    ) -> NDArray[np.int32]:
+        """Get electrode IDs by specifying channel numbers.
+
+        Parameters
+        ----------
+        channels : Iterable[int]
+            Target channel numbers.
+
+        Returns
+        -------
+        NDArray[np.int32]
+            The electrode IDs for `channels`.
+
+        Raises
+        ------
+        ValueError
+            When any of `channels` exceeds `n_channels`.
+        """
+
+        channels = np.asarray(channels, dtype=np.intp)
+        if channels.size and self._n_channels <= channels.max():
+            raise ValueError(f"Out of range: {self._n_channels}")
+        return self._array_1d[channels]
 
     def get_channel_by_electrode(
         self,
@@ -740,10 +897,7 @@ class ElectrodeMap:
             The channel number for `electrode` if exists; otherwise, `None`.
         """
 
-        out = np.where(self._array_1d == electrode)
-        if len(out[0]) == 0:
-            return None
-        return out[0][0]
+        return self._electrode_to_channel.get(int(electrode))
 
 
 class ElectrodeMapFactory(Protocol):
@@ -782,15 +936,38 @@ class SparseElectrodeMapFactory(ElectrodeMapFactory):
         self._interval = interval
 
     def create(self) -> ElectrodeMap:
-        center_offset = math.ceil(self._interval / 2)
-        x_offsets = (
-            (np.arange(0, N_MAP_COLUMNS, self._interval) + center_offset) - 1
-        )[1:-1]
+        return _create_sparse_electrode_map(self._interval)
+
+
+@lru_cache(maxsize=8)
+def _create_sparse_electrode_map(interval: int) -> ElectrodeMap:
+    """Create a sparse `ElectrodeMap`, shared by all factories using the
+    same interval.
+
+    Parameters
+    ----------
+    interval : int
+        The spacing between the electrodes used.
 
-        y_offsets = (np.arange(0, N_MAP_ROWS, self._interval) - 1)[2:-1]
-        map = [y * N_MAP_COLUMNS + x_offsets for y in y_offsets]
+    Returns
+    -------
+    ElectrodeMap
+        The sparse `ElectrodeMap` instance.
+    """
+
+    center_offset = math.ceil(interval / 2)
+    x_offsets = (
+        np.arange(0, N_MAP_COLUMNS, interval, dtype=ELECTRODE_DTYPE)
+        + center_offset
+        - 1
+    )[1:-1]
 
-        return ElectrodeMap(np.array(map))
+    y_offsets = (
+        np.arange(0, N_MAP_ROWS, interval, dtype=ELECTRODE_DTYPE) - 1
+    )[2:-1]
+    map = y_offsets[:, np.newaxis] * N_MAP_COLUMNS + x_offsets
+
+    return ElectrodeMap(map)
 
 
 class Motor(Protocol):
@@ -830,10 +1007,9 @@ class ChannelMotor(Motor):
 
         super().__init__()
 
-        self._sampling_electrodes: List[int] = []
-        for channel in channels:
-            electrode = electrode_map.get_electrode_by_channel(channel)
-            self._sampling_electrodes.append(electrode)
+        self._sampling_electrodes: NDArray[np.int32] = (
+            electrode_map.get_electrodes_by_channels(channels)
+        )
 
     @property
     def sampling_electrodes(self) -> Iterable[int]:
@@ -870,7 +1046,7 @@ class BoundsMotor(Motor):
         super().__init__()
 
         sub_map = map.array_2d[start_y:end_y, start_x:end_x]
-        self._sampling_electrodes: List[int] = sub_map.ravel().tolist()
+        self._sampling_electrodes: NDArray[np.int32] = sub_map.ravel()
 
     @property
     def sampling_electrodes(self) -> Iterable[int]:
@@ -925,17 +1101,12 @@ class ChannelSensor(Sensor):
 
         super().__init__()
 
-        self._sampling_electrodes: List[int] = []
-        self._stimulation_electrodes: List[int] = []
-
-        for channel in channels:
-            sampling_electrode = electrode_map.get_electrode_by_channel(
-                channel
-            )
-            self._sampling_electrodes.append(sampling_electrode)
-
-            stimulation_electrode = sampling_electrode + 1 + N_MAP_COLUMNS
-            self._stimulation_electrodes.append(stimulation_electrode)
+        self._sampling_electrodes: NDArray[np.int32] = (
+            electrode_map.get_electrodes_by_channels(channels)
+        )
+        self._stimulation_electrodes: NDArray[np.int32] = (
+            self._sampling_electrodes + 1 + N_MAP_COLUMNS
+        )
 
     @property
     def sampling_electrodes(self) -> Iterable[int]:
@@ -1001,16 +1172,10 @@ class ChannelPatterns(Patterns):
 
         super().__init__()
 
-        self._pattern_electrodes_map: List[List[int]] = []
-
-        for pattern in range(len(pattern_channels_map)):
-            pattern_electrodes: List[int] = []
-            pattern_channels = pattern_channels_map[pattern]
-            for channel in pattern_channels:
-                electrode = electrode_map.get_electrode_by_channel(channel)
-                pattern_electrodes.append(electrode)
-
-            self._pattern_electrodes_map.append(pattern_electrodes)
+        self._pattern_electrodes_map: List[NDArray[np.int32]] = [
+            electrode_map.get_electrodes_by_channels(pattern_channels)
+            for pattern_channels in pattern_channels_map
+        ]
 
     @property
     def n_patterns(self) -> int:
@@ -1042,26 +1207,41 @@ class ElectrodeArrayConfig:
 
         self._n_patterns = len(self._pattern_stimulation_electrodes_map)
 
-        self._sampling_electrodes: NDArray[np.int_] = np.unique(
-            np.sort(
-                np.hstack(
-                    (sensor_sampling_electrodes, motor_sampling_electrodes)
+        # `np.unique` returns sorted electrode IDs, so the channel of each
+        # sampling electrode is its position found by binary search. Each part
+        # is converted first because an empty list would otherwise be float64
+        self._sampling_electrodes: NDArray[np.int32] = np.unique(
+            np.concatenate(
+                (
+                    np.asarray(
+                        sensor_sampling_electrodes, dtype=ELECTRODE_DTYPE
+                    ),
+                    np.asarray(
+                        motor_sampling_electrodes, dtype=ELECTRODE_DTYPE
+                    ),
                 )
             )
         )
-        self._sampling_channels = list(range(len(self._sampling_electrodes)))
-
-        self._motor_sampling_channels: List[int] = []
-        for e in motor_sampling_electrodes:
-            self._motor_sampling_channels.append(
-                np.where(self._sampling_electrodes == e)[0][0]
-            )
-
-        self._sensor_sampling_channels: List[int] = []
-        for e in sensor_sampling_electrodes:
-            self._sensor_sampling_channels.append(
-                np.where(self._sampling_electrodes == e)[0][0]
+        self._sampling_channels = range(len(self._sampling_electrodes))
+
+        self._motor_sampling_channels: List[int] = np.searchsorted(
+            self._sampling_electrodes, motor_sampling_electrodes
+        ).tolist()
+
+        self._sensor_sampling_channels: List[int] = np.searchsorted(
+            self._sampling_electrodes, sensor_sampling_electrodes
+        ).tolist()
+
+        # All stimulation electrodes share the same routing priority, so
+        # they can be selected at once
+        self._stimulation_electrodes: List[int] = np.unique(
+            np.concatenate(
+                (
+                    sensor_stimulation_electrodes,
+                    *pattern_stimulation_electrodes_map,
+                )
             )
+        ).astype(int).tolist()
 
     @classmethod
     def create(
@@ -1123,6 +1303,19 @@ class ElectrodeArrayConfig:
 
         return self._sampling_electrodes
 
+    @property
+    def stimulation_electrodes(self) -> Iterable[int]:
+        """Get the all stimulation electrodes (sensor stimulation electrodes
+        + pattern stimulation electrodes).
+
+        Returns
+        -------
+        Iterable[int]
+            The stimulation electrodes.
+        """
+
+        return self._stimulation_electrodes
+
     @property
     def n_patterns(self) -> int:
         return self._n_patterns
@@ -1192,7 +1385,7 @@ class ElectrodeArrayController:
         self._array = array
         self._config = config
 
-        self._pattern_units_map: List[List[str]] = []
+        self._pattern_units_map: Tuple[Tuple[str, ...], ...] = ()
         self._sensor_units: List[str] = []
         self._random_sensor_units: List[str] = []
         self._random_sensor_electrodes: List[int] = []
@@ -1207,14 +1400,9 @@ class ElectrodeArrayController:
         self._array.select_electrodes(self._config.sampling_electrodes)
 
         self._array.select_stimulation_electrodes(
-            self._config.sensor_stimulation_electrodes
+            self._config.stimulation_electrodes
         )
 
-        for pattern in range(self._config.n_patterns):
-            self._array.select_stimulation_electrodes(
-                self._config.get_pattern_stimulation_electrodes(pattern)
-            )
-
         self._array.route()
         self._array.offset()
 
@@ -1222,12 +1410,15 @@ class ElectrodeArrayController:
         self._array.download()
 
     def prepare_all_pattern_stimulation_electrodes(self) -> None:
-        self._pattern_units_map: List[List[str]] = []
-        for pattern in range(self._config.n_patterns):
-            units = self._connect_stimulation_electrodes(
-                self._config.get_pattern_stimulation_electrodes(pattern)
+        # Fixed once prepared, so stored as tuples
+        self._pattern_units_map = tuple(
+            tuple(
+                self._connect_stimulation_electrodes(
+                    self._config.get_pattern_stimulation_electrodes(pattern)
+                )
             )
-            self._pattern_units_map.append(units)
+            for pattern in range(self._config.n_patterns)
+        )
 
     def prepare_sensor_stimulation_electrodes(self) -> None:
         self._sensor_units: List[str] = self._connect_stimulation_electrodes(
@@ -1267,12 +1458,10 @@ class ElectrodeArrayController:
         if not self._sensor_units:
             return
 
-        unit_indices = list(range(len(self._sensor_units)))
-        noise_indices = np.random.choice(unit_indices, size)
+        units = self._sensor_units
+        noise_indices = np.random.choice(len(units), size).tolist()
 
-        self._random_sensor_units = [
-            self.sensor_units[i] for i in noise_indices
-        ]
+        self._random_sensor_units = [units[i] for i in noise_indices]
         self._random_sensor_electrodes = (
             self._config.sensor_stimulation_electrodes
         )
@@ -1320,12 +1509,10 @@ class ElectrodeArrayController:
         self,
         units: Iterable[str],
     ) -> None:
-        for unit in units:
-            self._array.power_up_stimulation_unit(unit)
+        self._array.power_up_stimulation_units(units)
 
     def _power_down_stimulation_units(
         self,
         units: Iterable[str],
     ) -> None:
-        for unit in units:
-            self._array.power_down_stimulation_unit(unit)
+        self._array.power_down_stimulation_units(units)
@@ -24,11 +24,13 @@ from abc import ABC
 from struct import Struct
 from types import TracebackType
 from typing import (
+    Iterator,
     List,
     Optional,
     Protocol,
     Tuple,
     Type,
+    Union,
     final,
     runtime_checkable,
 )
@@ -76,8 +78,12 @@ _BUFFER_SIZE = (
 _FRAME_NUMBER_STRUCT = Struct("<Q")
 """The struct for the frame number (int)."""
 
-_AMPLITUDE_STRUCT = Struct("<f")
-"""The struct for the raw data (float)."""
+_AMPLITUDE_DTYPE = np.dtype("<f4")
+"""The dtype for the raw data (float)."""
+
+_NO_SPIKE_CHANNELS = np.empty((0,), np.int_)
+"""The (read-only) array of channels returned when no spike is detected."""
+_NO_SPIKE_CHANNELS.setflags(write=False)
 
 """New spike event structure for version > 24.1"""
 _NEW_ENC_BYTE_ORDER = "<"  # little endian
@@ -95,6 +101,15 @@ _NEW_SPIKE_EVENT_STRUCT = Struct(
     + _NEW_ENC_WELL_ID
     + _NEW_ENC_PAD
 )
+_NEW_SPIKE_EVENT_DTYPE = np.dtype(
+    [
+        ("frame_no", "<u8"),
+        ("amplitude", "<f4"),
+        ("channel", "<u2"),
+        ("well_id", "u1"),
+        ("pad", "u1"),
+    ]
+)
 
 """Old spike event structure for version < 24.1"""
 _OLD_ENC_BYTE_ORDER = "<"  # little endian
@@ -111,17 +126,29 @@ _OLD_SPIKE_EVENT_STRUCT = Struct(
     + _OLD_ENC_CHANNEL
     + _OLD_ENC_AMP
 )
+_OLD_SPIKE_EVENT_DTYPE = np.dtype(
+    [
+        ("pad", "u1", (7,)),
+        ("well_id", "u1"),
+        ("frame_no", "<u8"),
+        ("channel", "<i4"),
+        ("amplitude", "<f4"),
+    ]
+)
 
 try:
     # Version 24.1
     if maxlab.__git_hash__ == "45b31664d":
         _SPIKE_EVENT_STRUCT = _NEW_SPIKE_EVENT_STRUCT
+        _SPIKE_EVENT_DTYPE = _NEW_SPIKE_EVENT_DTYPE
     # Later version than 24.1
     else:
         _SPIKE_EVENT_STRUCT = _OLD_SPIKE_EVENT_STRUCT
+        _SPIKE_EVENT_DTYPE = _OLD_SPIKE_EVENT_DTYPE
 except AttributeError:
     # Older version (22.1/22.2)
     _SPIKE_EVENT_STRUCT = _OLD_SPIKE_EVENT_STRUCT
+    _SPIKE_EVENT_DTYPE = _OLD_SPIKE_EVENT_DTYPE
 """
 By Silvia's email:
     ...
@@ -146,6 +173,8 @@ RB:
 class SpikeEvent:
     """A class for representing a spike event."""
 
+    __slots__ = ("well_id", "frame_number", "channel", "amplitude")
+
     def __init__(
         self,
         well_id: int,
@@ -172,143 +201,134 @@ class SpikeEvent:
         self.channel = channel
         self.amplitude = amplitude
 
-    if _SPIKE_EVENT_STRUCT == _NEW_SPIKE_EVENT_STRUCT:
-
-        @classmethod
-        def _deserialize(
-            cls,
-            buffer: bytes,
-        ) -> List["SpikeEvent"]:
-            """Deserialize the specified bytes into the list of spike events.
-
-            Parameters
-            ----------
-            buffer : bytes
-                Bytes.
-
-            Returns
-            -------
-            List[SpikeEvent]
-                The list of deserialized spike events from the bytes.
-            """
-
-            # Set the class variable on the local one for performance.
-            struct = _SPIKE_EVENT_STRUCT
-
-            events: List[SpikeEvent] = []
-            for i in range(0, len(buffer), struct.size):
-                (
-                    frame_no,
-                    amplitude,
-                    channel,
-                    well_id,
-                    *_,
-                ) = struct.unpack_from(buffer, i)
-                event = SpikeEvent(well_id, frame_no, channel, amplitude)
-                events.append(event)
-
-            return events
-
-        @classmethod
-        def _deserialize_channels(
-            cls,
-            buffer: bytes,
-        ) -> List[int]:
-            """Deserialize only the channel number from the specified bytes.
-
-            Parameters
-            ----------
-            buffer : bytes
-                Bytes
-
-            Returns
-            -------
-            List[int]
-                The list of deserialized channels from the bytes.
-            """
-
-            struct = _SPIKE_EVENT_STRUCT
-
-            events: List[int] = []
-            for i in range(0, len(buffer), struct.size):
-                (
-                    _,
-                    _,
-                    channel,
-                    _,
-                    *_,
-                ) = struct.unpack_from(buffer, i)
-                events.append(channel)
-
-            return events
+    @classmethod
+    def _deserialize_channels(
+        cls,
+        buffer: Union[bytes, memoryview],
+    ) -> NDArray[np.int_]:
+        """Deserialize only the channel number from the specified bytes.
 
-    else:
+        Parameters
+        ----------
+        buffer : Union[bytes, memoryview]
+            Bytes (or a zero-copy view on them).
 
-        @classmethod
-        def _deserialize(
-            cls,
-            buffer: bytes,
-        ) -> List["SpikeEvent"]:
-            """Deserialize the specified bytes into the list of spike events.
-
-            Parameters
-            ----------
-            buffer : bytes
-                Bytes.
-
-            Returns
-            -------
-            List[SpikeEvent]
-                The list of deserialized spike events from the bytes.
-            """
-
-            # Set the class variable on the local one for performance.
-            struct = _SPIKE_EVENT_STRUCT
-
-            events: List[SpikeEvent] = []
-            for i in range(0, len(buffer), struct.size):
-                (
-                    *_,
-                    well_id,
-                    frame_no,
-                    channel,
-                    amplitude,
-                ) = struct.unpack_from(buffer, i)
-                event = SpikeEvent(well_id, frame_no, channel, amplitude)
-                events.append(event)
-
-            return events
-
-        @classmethod
-        def _deserialize_channels(
-            cls,
-            buffer: bytes,
-        ) -> List[int]:
-            """Deserialize only the channel number from the specified bytes.
-
-            Parameters
-            ----------
-            buffer : bytes
-                Bytes
-
-            Returns
-            -------
-            List[int]
-                The list of deserialized channels from the bytes.
-            """
-
-            struct = _SPIKE_EVENT_STRUCT
-
-            events: List[int] = []
-            for i in range(0, len(buffer), struct.size):
-                (
-                    *_,
-                    channel,
-                    _,
-                ) = struct.unpack_from(buffer, i)
-                events.append(channel)
-
-            return events
+        Returns
+        -------
+        NDArray[np.int_]
+            The array of deserialized channels from the bytes.
+        """
+
+        events = np.frombuffer(buffer, dtype=_SPIKE_EVENT_DTYPE)
+        return events["channel"]
+
+
+@final
+class SpikeEventBatch:
+    """A class for representing the spike events of a frame as arrays."""
+
+    def __init__(
+        self,
+        well_ids: NDArray[np.int_],
+        frame_numbers: NDArray[np.int_],
+        channels: NDArray[np.int_],
+        amplitudes: NDArray[np.float32],
+    ) -> None:
+        """Initialize a new instance.
+
+        Parameters
+        ----------
+        well_ids : NDArray[np.int_]
+            The IDs of the wells where the events occurred.
+        frame_numbers : NDArray[np.int_]
+            The numbers of the frames in which the spikes were detected.
+        channels : NDArray[np.int_]
+            The channels on which the spikes were detected.
+        amplitudes : NDArray[np.float32]
+            The last negative amplitudes when the spikes were detected.
+        """
+
+        self.well_ids = well_ids
+        self.frame_numbers = frame_numbers
+        self.channels = channels
+        self.amplitudes = amplitudes
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def __getitem__(
+        self,
+        index: int,
+    ) -> SpikeEvent:
+        """Build the `SpikeEvent` instance of a single event, on demand.
+
+        Parameters
+        ----------
+        index : int
+            The index of the event in this batch.
+
+        Returns
+        -------
+        SpikeEvent
+            The spike event.
+        """
+
+        return SpikeEvent(
+            int(self.well_ids[index]),
+            int(self.frame_numbers[index]),
+            int(self.channels[index]),
+            float(self.amplitudes[index]),
+        )
+
+    def __iter__(self) -> Iterator[SpikeEvent]:
+        return iter(self.to_list())
+
+    def to_list(self) -> List[SpikeEvent]:
+        """Build a `SpikeEvent` instance for each event of this batch.
+
+        Returns
+        -------
+        List[SpikeEvent]
+            The list of spike events.
+        """
+
+        return [
+            SpikeEvent(well_id, frame_number, channel, amplitude)
+            for well_id, frame_number, channel, amplitude in zip(
+                self.well_ids.tolist(),
+                self.frame_numbers.tolist(),
+                self.channels.tolist(),
+                self.amplitudes.tolist(),
+            )
+        ]
+
+    @classmethod
+    def _deserialize(
+        cls,
+        buffer: Union[bytes, memoryview],
+    ) -> "SpikeEventBatch":
+        """Deserialize the specified bytes into a batch of spike events.
+
+        Parameters
+        ----------
+        buffer : Union[bytes, memoryview]
+            Bytes (or a zero-copy view on them).
+
+        Returns
+        -------
+        SpikeEventBatch
+            The batch of deserialized spike events from the bytes.
+        """
+
+        # Views on each field of the structured dtype matching
+        # `_SPIKE_EVENT_STRUCT`, without decoding the events one by one.
+        events = np.frombuffer(buffer, dtype=_SPIKE_EVENT_DTYPE)
+        return SpikeEventBatch(
+            events["well_id"],
+            events["frame_no"],
+            events["channel"],
+            events["amplitude"],
+        )
 
 
 @final
@@ -406,55 +426,83 @@ class MaxWellStream:
         struct = _FRAME_NUMBER_STRUCT
 
         zmq_frame = self._subscriber.recv(copy=False)
-        number = struct.unpack(zmq_frame.bytes)[0]
+        number = struct.unpack_from(zmq_frame.buffer)[0]
         return (number, zmq_frame.more)
 
-    def receive_amplitudes(self) -> Tuple[List[float], bool]:
+    def receive_frame(
+        self,
+    ) -> Tuple[int, Optional[NDArray[np.float32]], Optional[memoryview]]:
+        """Receive all the message parts of the current frame at once.
+        This method blocks the current thread until it receives the frame data.
+
+        Returns
+        -------
+        frame_number : int
+            The number of the current frame.
+        amplitudes : Optional[NDArray[np.float32]]
+            Amplitudes for the current frame (read-only) if sent; otherwise,
+            `None`.
+        spike_events : Optional[memoryview]
+            The serialized spike events of the current frame if sent;
+            otherwise, `None`.
+        """
+
+        parts = self._subscriber.recv_multipart(copy=False)
+        number = _FRAME_NUMBER_STRUCT.unpack_from(parts[0].buffer)[0]
+
+        amplitudes = None
+        if len(parts) > 1:
+            amplitudes = np.frombuffer(parts[1].buffer, dtype=_AMPLITUDE_DTYPE)
+
+        spike_events = None
+        if len(parts) > 2:
+            spike_events = parts[2].buffer
+
+        return (number, amplitudes, spike_events)
+
+    def receive_amplitudes(self) -> Tuple[NDArray[np.float32], bool]:
         """Receive amplitudes for the current frame.
         This method can be called if receive_frame_number() results in
         more=True.
 
         Returns
         -------
-        data : List[float]
-            Amplitudes for the current frame.
+        data : NDArray[np.float32]
+            Amplitudes for the current frame (read-only).
         more : bool
             True if there are more message parts to receive; otherwise, False.
         """
 
-        # Set the class variable on the local one for performance.
-        struct = _AMPLITUDE_STRUCT
-
         zmq_frame = self._subscriber.recv(copy=False)
-        data = [i[0] for i in struct.iter_unpack(zmq_frame.bytes)]
+        data = np.frombuffer(zmq_frame.buffer, dtype=_AMPLITUDE_DTYPE)
         return (data, zmq_frame.more)
 
-    def receive_spike_events(self) -> List[SpikeEvent]:
+    def receive_spike_events(self) -> SpikeEventBatch:
         """Receive detected spike events.
         This method can be called if receive_amplitudes() results in more=True.
 
         Returns
         -------
-        List[SpikeEvent]
-            The list of detected spike events.
+        SpikeEventBatch
+            The batch of detected spike events.
         """
 
         zmq_frame = self._subscriber.recv(copy=False)
-        events = SpikeEvent._deserialize(zmq_frame.bytes)
+        events = SpikeEventBatch._deserialize(zmq_frame.buffer)
         return events
 
-    def receive_spike_channels(self) -> List[int]:
-        """Retrieve a list of channels where spikes are detected.
+    def receive_spike_channels(self) -> NDArray[np.int_]:
+        """Retrieve an array of channels where spikes are detected.
         This method can be called if receive_amplitudes() results in more=True.
 
         Returns
         -------
-        List[int]
-            The list of channels where spikes are detected.
+        NDArray[np.int_]
+            The array of channels where spikes are detected.
         """
 
         zmq_frame = self._subscriber.recv(copy=False)
-        channels = SpikeEvent._deserialize_channels(zmq_frame.bytes)
+        channels = SpikeEvent._deserialize_channels(zmq_frame.buffer)
         return channels
 
 
@@ -468,7 +516,7 @@ class SpikeStream(Protocol):
         """Disconnect from the server producing spike events."""
         ...
 
-    def receive_spike_channels(self) -> List[int]: ...
+    def receive_spike_channels(self) -> NDArray[np.int_]: ...
 
 
 class SpikeStreamABC(SpikeStream, ABC):
@@ -515,22 +563,20 @@ class DebugSpikeStream(SpikeStreamABC):
     def disconnect(self) -> None:
         pass
 
-    def receive_spike_channels(self) -> List[int]:
+    def receive_spike_channels(self) -> NDArray[np.int_]:
         # To improve the loop performance.
         frequency = self.frequency
         n_concurrent_detections = self.n_concurrent_detections
-        last_channel_index = self.n_channels - 1
 
         detected = random.randint(1, frequency) == 1
         if detected:
             n_detections = random.randint(1, n_concurrent_detections)
-            channels: List[int] = []
-            for _ in range(n_detections):
-                channel = random.randint(0, last_channel_index)
-                channels.append(channel)
-            return channels
+            # For a handful of values, the `random` module draws faster than
+            # a NumPy generator call.
+            channels = random.choices(range(self.n_channels), k=n_detections)
+            return np.array(channels)
         else:
-            return []
+            return _NO_SPIKE_CHANNELS
 
 
 class MaxWellSpikeStream(SpikeStreamABC):
@@ -570,19 +616,16 @@ class MaxWellSpikeStream(SpikeStreamABC):
         self._stream.disconnect()
         self._stream = None
 
-    def receive_spike_channels(self) -> List[int]:
+    def receive_spike_channels(self) -> NDArray[np.int_]:
         if self._stream is None:
             raise RuntimeError("SpikeStream is not connected.")
 
-        (_, more) = self._stream.receive_frame_number()
-
-        if more:
-            (_, more) = self._stream.receive_amplitudes()
+        (_, _, spike_events) = self._stream.receive_frame()
 
-        if more:
-            return self._stream.receive_spike_channels()
+        if spike_events is not None:
+            return SpikeEvent._deserialize_channels(spike_events)
         else:
-            return []
+            return _NO_SPIKE_CHANNELS
 
 
 @runtime_checkable
@@ -652,6 +695,7 @@ class DebugSampleStream(SampleStream):
         super().__init__()
 
         self._counter = 0
+        self._rng = np.random.default_rng()
 
     def connect(self) -> None:
         pass
@@ -670,11 +714,9 @@ class DebugSampleStream(SampleStream):
 
         amp = -1 / (self._counter + 1)
 
-        n_channels = len(channels)
-        data = np.empty((n_samples, n_channels))
-
-        for i in range(n_samples):
-            data[i] = np.random.random(n_channels) * amp
+        # Generated in float32, as `MaxWellSampleStream` returns
+        data = self._rng.random((n_samples, len(channels)), np.float32)
+        data *= amp
 
         self._counter += 1
 
@@ -702,6 +744,7 @@ class MaxWellSampleStream(SampleStream):
 
         self._hostname = hostname
         self._stream: Optional[MaxWellStream] = None
+        self._map: Optional[NDArray[np.float32]] = None
 
     def connect(self) -> None:
         if self._stream is not None:
@@ -725,17 +768,22 @@ class MaxWellSampleStream(SampleStream):
         if self._stream is None:
             raise RuntimeError("SampleStream is not connected.")
 
-        map = np.zeros((n_samples, _MAX_N_FULL_SAMPLING_CHANNELS))
+        # Reuse the map between calls, in the wire format (float32). Every
+        # row is overwritten below and the channel selection returns a copy.
+        map = self._map
+        if map is None or map.shape[0] != n_samples:
+            map = np.empty(
+                (n_samples, _MAX_N_FULL_SAMPLING_CHANNELS), np.float32
+            )
+            self._map = map
 
         for i in range(n_samples):
-            (_, more) = self._stream.receive_frame_number()
+            (_, amplitudes, _) = self._stream.receive_frame()
 
-            if more:
-                (amplitudes, more) = self._stream.receive_amplitudes()
+            if amplitudes is not None:
                 map[i, :] = amplitudes
-
-            if more:
-                self._stream.receive_spike_events()
+            else:
+                map[i, :] = 0
 
         return map[:, channels]
 
@@ -782,16 +830,17 @@ class SpikeCounter:
         try:
             self._stream.connect()
             for _ in range(seconds):
-                all_spike_channels = []
+                all_spike_channels: List[NDArray[np.int_]] = []
                 for _ in range(SAMPLING_FREQUENCY):
                     spike_channels = self._stream.receive_spike_channels()
-                    all_spike_channels.extend(spike_channels)
-
-                unique_spike_channels, spike_channel_counts = np.unique(
-                    all_spike_channels, return_counts=True
-                )
-                if unique_spike_channels.size != 0:
-                    spike_counts[unique_spike_channels] += spike_channel_counts
+                    if spike_channels.size != 0:
+                        all_spike_channels.append(spike_channels)
+
+                if all_spike_channels:
+                    spike_counts += np.bincount(
+                        np.concatenate(all_spike_channels),
+                        minlength=_MAX_N_FULL_SAMPLING_CHANNELS,
+                    )
 
             return spike_counts[:n_channels].tolist()
         finally:
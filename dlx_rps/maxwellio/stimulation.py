@@ -18,16 +18,19 @@
 # > **01 Jul 2024** : add new class for stream of pulses stimulation (RB)
 # > **01 Jul 2024** : fix stimulation event export in .raw.h5 from v24.1 (RB)
 
+from functools import lru_cache
 from typing import Protocol
 
 import maxlab
 import maxlab.util
 import numpy as np
+from numpy.typing import NDArray
 from maxlab.chip import DAC
 from maxlab.system import (
     DelaySamples,
     Event,
 )
+from scipy.signal import lfilter
 from scipy.stats import truncnorm
 
 from maxwellio.sampling import SAMPLING_FREQUENCY
@@ -47,6 +50,12 @@ MAX_AMPLITUDE = int(_DAC_CODE_ZERO * _DAC_CODE_RESOLUTION)
 MIN_AMPLITUDE = -MAX_AMPLITUDE
 """Min amplitude (mV) = -int(512 * 2.9)."""
 
+_MIN_REJECTION_BOUND = 0.5
+"""Narrowest truncation bound (standard deviations) sampled by rejection,
+below that most draws are rejected and `truncnorm` is faster."""
+
+_rng = np.random.default_rng()
+
 
 def _to_dac_code(mV: float) -> int:
     """Convert a voltage (mV) to the DAC code.
@@ -69,6 +78,61 @@ def _to_dac_code(mV: float) -> int:
     return _DAC_CODE_ZERO - round(mV / _DAC_CODE_RESOLUTION)
 
 
+def _to_dac_codes(mV: NDArray[np.float64]) -> NDArray[np.int16]:
+    """Convert voltages (mV) to the DAC codes, same as `_to_dac_code`.
+
+    Parameters
+    ----------
+    mV : NDArray[np.float64]
+        Voltages (mV).
+
+    Returns
+    -------
+    NDArray[np.int16]
+        The DAC codes.
+    """
+
+    mV = np.clip(mV, MIN_AMPLITUDE, MAX_AMPLITUDE)
+
+    # np.rint rounds half to even like round()
+    codes = _DAC_CODE_ZERO - np.rint(mV / _DAC_CODE_RESOLUTION)
+    return codes.astype(np.int16)
+
+
+def _truncated_standard_normal(
+    bound: float,
+    size: int,
+) -> NDArray[np.float64]:
+    """Draw from the standard normal distribution truncated to
+    [-bound, bound].
+
+    Parameters
+    ----------
+    bound : float
+        The truncation bound in standard deviations.
+    size : int
+        The number of samples.
+
+    Returns
+    -------
+    NDArray[np.float64]
+        The samples.
+    """
+
+    if bound < _MIN_REJECTION_BOUND:
+        return truncnorm.rvs(-bound, bound, size=size, random_state=_rng)
+
+    # Redraw the samples out of bounds until none is left
+    z = _rng.standard_normal(size)
+    rejected = np.flatnonzero(np.abs(z) > bound)
+    while len(rejected) > 0:
+        z[rejected] = _rng.standard_normal(len(rejected))
+        rejected = rejected[np.abs(z[rejected]) > bound]
+
+    return z
+
+
+@lru_cache(maxsize=256)
 def _frequency_to_samples(frequency: float) -> int:
     """Convert frequency to the number of samples.
 
@@ -86,6 +150,7 @@ def _frequency_to_samples(frequency: float) -> int:
     return int(SAMPLING_FREQUENCY / frequency)
 
 
+@lru_cache(maxsize=256)
 def _period_to_samples(period: float) -> int:
     """Convert period to the number of samples.
 
@@ -126,6 +191,22 @@ class Stimulator(Protocol):
         """
         ...
 
+    def add_many(
+        self,
+        codes: NDArray[np.int16],
+        n_samples: NDArray[np.int_],
+    ) -> None:
+        """Add stimulations from DAC codes in a batch.
+
+        Parameters
+        ----------
+        codes : NDArray[np.int16]
+            DAC code of each stimulation, see `_to_dac_codes`.
+        n_samples : NDArray[np.int_]
+            Number of samples to stimulate for each code.
+        """
+        ...
+
     def add_event_flag(
         self,
         mV: float,
@@ -147,6 +228,50 @@ class Stimulator(Protocol):
         ...
 
 
+def _add_runs(
+    stimulator: Stimulator,
+    codes: NDArray[np.int16],
+    n_samples: NDArray[np.int_],
+) -> None:
+    """Add stimulations, merging consecutive ones with the same DAC code,
+    in one `Stimulator.add_many` call.
+
+    Parameters
+    ----------
+    stimulator : Stimulator
+        A Stimulator instance to add the stimulations to.
+    codes : NDArray[np.int16]
+        DAC code of each stimulation.
+    n_samples : NDArray[np.int_]
+        Number of samples to stimulate for each code.
+    """
+
+    if len(codes) == 0:
+        return
+
+    starts = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], starts))
+
+    stimulator.add_many(codes[starts], np.add.reduceat(n_samples, starts))
+
+
+def _add_samples(
+    stimulator: Stimulator,
+    mV: NDArray[np.float64],
+) -> None:
+    """Add stimulation of one sample per voltage, see `_add_runs`.
+
+    Parameters
+    ----------
+    stimulator : Stimulator
+        A Stimulator instance to add the samples to.
+    mV : NDArray[np.float64]
+        Voltage (mV) of each sample.
+    """
+
+    _add_runs(stimulator, _to_dac_codes(mV), np.ones(len(mV), np.int_))
+
+
 class StimulatorBuilder(Protocol):
     """A protocol to build a `Stimulator` instance."""
 
@@ -174,6 +299,13 @@ class EmptyStimulator(Stimulator):
     ) -> None:
         pass
 
+    def add_many(
+        self,
+        codes: NDArray[np.int16],
+        n_samples: NDArray[np.int_],
+    ) -> None:
+        pass
+
     def add_event_flag(
         self,
         mV: float,
@@ -204,6 +336,16 @@ class MaxWellStimulator(Stimulator):
         self._sequence.append(DAC(0, _to_dac_code(mV)))
         self._sequence.append(DelaySamples(n_samples))
 
+    def add_many(
+        self,
+        codes: NDArray[np.int16],
+        n_samples: NDArray[np.int_],
+    ) -> None:
+        append = self._sequence.append
+        for code, n in zip(codes.tolist(), n_samples.tolist()):
+            append(DAC(0, code))
+            append(DelaySamples(n))
+
     def add_event_flag(
         self,
         mV: float,
@@ -281,12 +423,19 @@ class PulseStreamStimulatorBuilder(StimulatorBuilder):
         # The number of samples between pulses
         n_samples_inter_pulse = _period_to_samples(self.ipi_ms * 1e-3)
 
+        # One pulse followed by the inter pulse interval
+        codes = _to_dac_codes(np.array([high, low, no_stim]))
+        n_samples = np.array(
+            [n_samples_in_high, n_samples_in_low, n_samples_inter_pulse]
+        )
+
         # Just one stimulation trigger at the beginning of pulse stream
         stimulator.add_event_flag(self.amplitude_mv, self.period_us)
-        for _ in range(self.nb_pulses):
-            stimulator.add(high, n_samples_in_high)
-            stimulator.add(low, n_samples_in_low)
-            stimulator.add(no_stim, n_samples_inter_pulse)
+        _add_runs(
+            stimulator,
+            np.tile(codes, self.nb_pulses),
+            np.tile(n_samples, self.nb_pulses),
+        )
 
 
 class SquareWaveStimulatorBuilder(StimulatorBuilder):
@@ -336,8 +485,10 @@ class SquareWaveStimulatorBuilder(StimulatorBuilder):
         n_samples_in_low = samples_in_cycle - n_samples_in_high
 
         stimulator.add_event_flag(self.amplitude, 1 / self.frequency)
-        stimulator.add(high, n_samples_in_high)
-        stimulator.add(low, n_samples_in_low)
+        stimulator.add_many(
+            _to_dac_codes(np.array([high, low])),
+            np.array([n_samples_in_high, n_samples_in_low]),
+        )
 
 
 class SineWaveStimulatorBuilder(StimulatorBuilder):
@@ -373,15 +524,15 @@ class SineWaveStimulatorBuilder(StimulatorBuilder):
     ) -> None:
         # The number of samples in the frequency
         samples_in_cycle = _frequency_to_samples(self.frequency)
-        # Time points
-        t = np.linspace(0, 1, samples_in_cycle)
+        # Phase of each sample over one period, float32 is far more precise
+        # than the DAC code resolution
+        step = np.float32(2 * np.pi / max(samples_in_cycle, 1))
+        phase = np.arange(samples_in_cycle, dtype=np.float32) * step
         # Sine amplitudes
-        y = np.sin(t)
+        y = np.sin(phase) * self.amplitude + self.offset
 
         stimulator.add_event_flag(self.amplitude, 1 / self.frequency)
-        for i in range(samples_in_cycle):
-            amplitude = y[i] * self.amplitude + self.offset
-            stimulator.add(amplitude, 1)
+        _add_samples(stimulator, y)
 
 
 class GaussianNoiseWaveStimulatorBuilder(StimulatorBuilder):
@@ -423,18 +574,11 @@ class GaussianNoiseWaveStimulatorBuilder(StimulatorBuilder):
         samples_in_cycle = _frequency_to_samples(self.frequency)
 
         # Use truncated normal distribution
-        voltages = truncnorm.rvs(
-            -self.amplitude,
-            self.amplitude,
-            loc=self.mu,
-            scale=self.sigma,
-            size=samples_in_cycle,
-        )
+        z = _truncated_standard_normal(self.amplitude, samples_in_cycle)
+        voltages = self.mu + self.sigma * z
 
         stimulator.add_event_flag(self.amplitude, 1 / self.frequency)
-        for i in range(samples_in_cycle):
-            voltage = voltages[i]
-            stimulator.add(voltage, 1)
+        _add_samples(stimulator, voltages)
 
 
 class SynapticNoiseWaveStimulatorBuilder(StimulatorBuilder):
@@ -470,9 +614,9 @@ class SynapticNoiseWaveStimulatorBuilder(StimulatorBuilder):
 
         self.frequency = frequency
         self.amplitude = amplitude
-        self.mu: float = 0
-        self.sigma: float = 0
-        self.theta: float = 1
+        self.mu = mu
+        self.sigma = sigma
+        self.theta = theta
 
     def build(
         self,
@@ -486,13 +630,20 @@ class SynapticNoiseWaveStimulatorBuilder(StimulatorBuilder):
         mu = self.mu
         sigma = self.sigma
         theta = self.theta
-        # Initial value
-        previous = mu
+        # Exact discretization over one time step:
+        # x[i] = mu + a * (x[i-1] - mu) + std * xi[i], with xi ~ N(0, 1)
+        a = np.exp(-theta * dt)
+        if theta > 0:
+            std = sigma * np.sqrt((1 - a * a) / (2 * theta))
+        else:
+            std = sigma * np.sqrt(dt)
+        xi = _rng.standard_normal(samples_in_cycle)
+
+        # x[i] = a * x[i-1] + b[i], starting from x[-1] = mu, is a first
+        # order IIR filter on b
+        b = (1 - a) * mu + std * xi
+        x, _ = lfilter([1], [1, -a], b, zi=[a * mu])
+        voltages = np.clip(x, -self.amplitude, self.amplitude)
 
         stimulator.add_event_flag(self.amplitude, 1 / self.frequency)
-        for _ in range(samples_in_cycle):
-            dw = np.sqrt(dt) * np.random.normal()
-            x = previous + theta * dt * (mu - previous) + sigma * dw
-            previous = x
-            voltage = np.clip(x, -self.amplitude, self.amplitude)
-            stimulator.add(voltage, 1)
+        _add_samples(stimulator, voltages)
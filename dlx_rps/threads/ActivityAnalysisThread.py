@@ -12,9 +12,8 @@
 # 
 # @details
 
-import time
 import numpy as np
-from PyQt5.QtCore import (QThread, pyqtSignal)
+from PyQt5.QtCore import (QThread, QTimer, pyqtSignal)
 
 from config import DEBUG
 from utils.logger import setup_logger
@@ -30,8 +29,8 @@ class ActivityAnalysisThread(QThread):
         self.stop_requested = False
 
         # Conversion array from channels to electrode index
-        self.chan2el = chan2el # chan2el[channel] -> electrode
-        logger.debug(f"Channel {0} is connected to electrode {chan2el[0]}")
+        self.chan2el = np.ascontiguousarray(chan2el, dtype=np.int32) # chan2el[channel] -> electrode, contiguous int32 for indexing
+        logger.debug("Channel %d is connected to electrode %d", 0, chan2el[0])
 
         # Connect forward data to analysis when available
         rx_samples_rdy.connect(self.analyze_activity)
@@ -44,9 +43,18 @@ class ActivityAnalysisThread(QThread):
         """Run thread"""
         logger.info("Start activity analysis ...")
 
-        while not self.stop_requested:
-            time.sleep(0.1)
+        # Idle in the event loop until stop() instead of polling. A quit() from stop() is lost if it
+        # lands before exec_() starts, so the flag is checked again once the loop is running
+        if not self.stop_requested:
+            QTimer.singleShot(0, self.quit_if_stop_requested)
+            self.exec_()
+
+    def quit_if_stop_requested(self):
+        """Leave the event loop if stop() was already requested"""
+        if self.stop_requested:
+            self.quit()
 
     def stop(self):
         """Stop thread"""
-        self.stop_requested = True
\ No newline at end of file
+        self.stop_requested = True
+        self.quit()
\ No newline at end of file
@@ -40,6 +40,8 @@ class MaxwellReadStreamThread(QThread):
 
     def read_activity_maxwell(self):
         """Read samples from Maxwell API and emit when ready"""
+        # Fresh array per packet: the queued signal hands the object itself to receivers,
+        # which may run several packets behind
         self.rx_samples_rdy.emit(self.sample_stream.sample(self.n_samples, self.channels))
         if DEBUG:
             time.sleep(self.n_samples/20000) # 20kHz sampling frequency
@@ -21,9 +21,8 @@
 # 
 # @details
 
-import time
 import numpy as np
-from PyQt5.QtCore import (QThread, pyqtSignal)
+from PyQt5.QtCore import (QThread, QTimer, pyqtSignal)
 
 from config import DEBUG, MAX_STIM_EL_MAXWELL, MAX_PARAMS_STIM_MAXWELL, PARAMS_STIM_MAXWELL
 from utils.logger import setup_logger
@@ -35,6 +34,11 @@ from maxwellio.array import (ElectrodeArray)
 
 _FIXED_STIM_EL = False # Fixed stimulation connection and protocol for all stim electrodes
 
+# Column of each stimulation parameter in stimulation data
+_IDX_EL_ID        = PARAMS_STIM_MAXWELL['EL_ID']
+_IDX_STIM_AMP_MV  = PARAMS_STIM_MAXWELL['STIM_AMP_MV']
+_IDX_STIM_FREQ_HZ = PARAMS_STIM_MAXWELL['STIM_FREQ_HZ']
+
 class MaxwellStimulationThread(QThread):
     """Send stimulation to Maxwell"""    
     def __init__(self, elec_array:ElectrodeArray, stim_flag_data, stim_el, stim_amp_mv, stim_freq_hz):
@@ -42,12 +46,24 @@ class MaxwellStimulationThread(QThread):
         super().__init__()
 
         # Thread parameters
-        self.stop_requested = True
+        self.stop_requested = False
 
         # Maxwell stimulation
         self.elec_array = elec_array # electrode array object
         self.fixed_stimulator, self.fixed_stim_units = self.init_fixed_stimulation(stim_el, stim_amp_mv, stim_freq_hz)
+        self.fixed_powered_units = set(self.fixed_stim_units) # all powered up by init
         self.dynamic_stim_units = []
+        self.dynamic_stimulators = {} # (amp_mv, freq_hz) -> stimulator, sequences are kept on the server
+        _PULSE_PHASE_US = 200
+        _NB_PULSES      = 4
+        self.dynamic_stim_builder = PulseStreamStimulatorBuilder( # amplitude and ipi set per protocol
+            period_us    = 2*_PULSE_PHASE_US,
+            amplitude_mv = 0.0,
+            offset       = 0.0,
+            nb_pulses    = _NB_PULSES,
+            ipi_ms       = 1,
+            duty_cycle   = 0.5,
+        )
 
         # Connect signals
         stim_flag_data.connect(self.stimulate_maxwell)
@@ -61,15 +77,16 @@ class MaxwellStimulationThread(QThread):
 
         # Dynamic electrode stimulation (stimulation electrode may change location and protocol)
         if not _FIXED_STIM_EL:
-            amp_mv  = stim_data[0, PARAMS_STIM_MAXWELL['STIM_AMP_MV']]  # for now, same stim for all selected electrodes
-            freq_hz = stim_data[0, PARAMS_STIM_MAXWELL['STIM_FREQ_HZ']] # for now, same stim for all selected electrodes
+            amp_mv  = stim_data[0, _IDX_STIM_AMP_MV]  # for now, same stim for all selected electrodes
+            freq_hz = stim_data[0, _IDX_STIM_FREQ_HZ] # for now, same stim for all selected electrodes
             
             # Power off all units
-            for stim_unit in self.dynamic_stim_units:
-                self.elec_array.power_down_stimulation_unit(stim_unit)
+            if self.dynamic_stim_units:
+                self.elec_array.power_down_stimulation_units(self.dynamic_stim_units)
+                self.dynamic_stim_units = []
 
             # Route new electrodes and power up stimulatio units
-            for el in stim_data[:,PARAMS_STIM_MAXWELL['EL_ID']].astype(int):
+            for el in stim_data[:, _IDX_EL_ID].astype(np.int32).tolist():
                 self.elec_array.connect_electrode_to_stimulation( el )
                 stim = self.elec_array.query_stimulation_at_electrode( el )
                 if stim:
@@ -77,35 +94,36 @@ class MaxwellStimulationThread(QThread):
                 else:
                     logger.warning("No stimulation channel can connect to electrode: %d", el)
 
-                self.elec_array.power_up_stimulation_unit(stim)
-
-            # Create new stimulation protocol (shared by all stim electrodes)
-            self.dynamic_stimulator = EmptyStimulator() if DEBUG else MaxWellStimulator()
-            _PULSE_PHASE_US = 200
-            _NB_PULSES      = 4
-            stim_builder = PulseStreamStimulatorBuilder(
-                period_us    = 2*_PULSE_PHASE_US,
-                amplitude_mv = amp_mv,
-                offset       = 0.0,
-                nb_pulses    = _NB_PULSES,
-                ipi_ms       = 1e3/freq_hz,
-                duty_cycle   = 0.5,
-            )
-            stim_builder.build(self.dynamic_stimulator)
+            self.elec_array.power_up_stimulation_units(self.dynamic_stim_units)
+
+            # Create new stimulation protocol (shared by all stim electrodes) unless
+            # the same one was already built
+            key = (float(amp_mv), float(freq_hz))
+            self.dynamic_stimulator = self.dynamic_stimulators.get(key)
+            if self.dynamic_stimulator is None:
+                self.dynamic_stimulator = EmptyStimulator() if DEBUG else MaxWellStimulator()
+                self.dynamic_stim_builder.amplitude_mv = amp_mv
+                self.dynamic_stim_builder.ipi_ms       = 1e3/freq_hz
+                self.dynamic_stim_builder.build(self.dynamic_stimulator)
+                self.dynamic_stimulators[key] = self.dynamic_stimulator
 
             # Send stimulation trigger
             self.dynamic_stimulator.stimulate()
             logger.debug("Sent dynamic electrode stimulation")
         else:
             # Parse stimulation units to power up amongst the fixed electrodes
-            selected_stim_units = [self.elec_array.query_stimulation_at_electrode(int(el)) for el in stim_data[:, PARAMS_STIM_MAXWELL['EL_ID']]]
-
-            # Power up/down stimulation units
-            for stim_unit in self.fixed_stim_units:
-                if stim_unit in selected_stim_units:
-                    self.elec_array.power_up_stimulation_unit(stim_unit)
-                else:
-                    self.elec_array.power_down_stimulation_unit(stim_unit)
+            stim_el = stim_data[:, _IDX_EL_ID].astype(np.int32).tolist()
+            # electrode without stimulation unit queries to '' (None in debug), leave it out
+            selected_stim_units = {unit for el in stim_el
+                                   if (unit := self.elec_array.query_stimulation_at_electrode(el))}
+
+            # Power up/down only the stimulation units changing state
+            powered_units = selected_stim_units.intersection(self.fixed_stim_units)
+            if units_up := powered_units - self.fixed_powered_units:
+                self.elec_array.power_up_stimulation_units(units_up)
+            if units_down := self.fixed_powered_units - powered_units:
+                self.elec_array.power_down_stimulation_units(units_down)
+            self.fixed_powered_units = powered_units
 
             # Send stimulation trigger
             self.fixed_stimulator.stimulate()
@@ -127,8 +145,7 @@ class MaxwellStimulationThread(QThread):
             else:
                 logger.warning("No stimulation channel can connect to electrode: %d", el)
 
-        for stimulation_unit in stimulation_units:
-            self.elec_array.power_up_stimulation_unit(stimulation_unit)
+        self.elec_array.power_up_stimulation_units(stimulation_units)
 
         logger.info("Connected stimulation electrodes and powered up units")
 
@@ -152,9 +169,18 @@ class MaxwellStimulationThread(QThread):
         """Run thread"""
         logger.info("Ready Maxwell stimualtion sending ...")
 
-        while not self.stop_requested:
-            time.sleep(0.1)
+        # Idle in the event loop until stop() instead of polling. A quit() from stop() is lost if it
+        # lands before exec_() starts, so the flag is checked again once the loop is running
+        if not self.stop_requested:
+            QTimer.singleShot(0, self.quit_if_stop_requested)
+            self.exec_()
+
+    def quit_if_stop_requested(self):
+        """Leave the event loop if stop() was already requested"""
+        if self.stop_requested:
+            self.quit()
 
     def stop(self):
         """Stop thread"""
-        self.stop_requested = True
\ No newline at end of file
+        self.stop_requested = True
+        self.quit()
\ No newline at end of file
@@ -37,14 +37,20 @@ class PatternGeneratorThread(QThread):
         # but current version only support identical amp/freq for all electrodes
         # the handling of different protocol per stimulation unit in dynamic is
         # a bit of a pain
-        self.dummy_stim_pattern = np.zeros((MAX_STIM_EL_MAXWELL, MAX_PARAMS_STIM_MAXWELL))
+        self.dummy_stim_pattern = np.empty((MAX_STIM_EL_MAXWELL, MAX_PARAMS_STIM_MAXWELL), dtype=np.float32) # electrode ids are exact in float32, every column is set below
         self.dummy_stim_pattern[:,PARAMS_STIM_MAXWELL['EL_ID']] = np.arange(MAX_STIM_EL_MAXWELL)
         self.dummy_stim_pattern[:,PARAMS_STIM_MAXWELL['STIM_AMP_MV']] = 400
         self.dummy_stim_pattern[:,PARAMS_STIM_MAXWELL['STIM_FREQ_HZ']] = 100
+        self.dummy_stim_pattern.setflags(write=False) # same array emitted every time, receivers must not modify it
         self.posture = None
 
     def send_stim_pattern(self, posture):
-        logger.info(f"Received posture change: {posture}")
+        # Only re-program stimulation when the posture actually changed
+        if posture == self.posture:
+            return
+        self.posture = posture
+
+        logger.info("Received posture change: %s", posture)
         self.stim_flag_data.emit(self.dummy_stim_pattern)
 
     def run(self):
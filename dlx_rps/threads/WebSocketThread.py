@@ -7,6 +7,7 @@ import pygame
 from hand_gestures_to_pattern import pygame_screen, frame_processor
 import websockets
 import asyncio
+import queue
 import threading
 from PyQt5.QtCore import pyqtSignal, QThread
 
@@ -19,13 +20,17 @@ class WebSocketThread(QThread):
         self.host = host
         self.port = port
         self.client_input = None  # Store input from the WebSocket client
+        self.input_queue = queue.SimpleQueue()  # Client messages, from the asyncio thread to the pygame loop
         self.current_posture = None  # Track the current posture
         self.server = None
+        self.loop = None  # asyncio loop serving the WebSocket
         self.frame_processor = frame_processor.FrameProcessor()
         self.screen = pygame_screen.PygameScreen()
         self.messages = ["rock", "paper", "scissors"]
         self.key_events = []
         self.keys = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]
+        self.message_to_index = {message: i for i, message in enumerate(self.messages)}
+        self.key_to_index = {key: i for i, key in enumerate(self.keys)}
         self.running = True  # To control the thread loop
 
     # WebSocket server handling
@@ -33,7 +38,7 @@ class WebSocketThread(QThread):
         try:
             async for message in websocket:
                 print(f"Received message: {message}")
-                self.client_input = message  # Store the input from the WebSocket client
+                self.input_queue.put(message)  # Hand the input over to the pygame loop
         except websockets.ConnectionClosed:
             print("Client disconnected")
 
@@ -44,55 +49,79 @@ class WebSocketThread(QThread):
         await self.server.wait_closed()  # Keeps the server running
 
     def run_websocket(self):
-        asyncio.run(self.start_websocket_server())
+        # Keep the loop so that the server can be closed from another thread
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.start_websocket_server())
+        finally:
+            self.loop.close()
+
+    def stop_websocket_server(self):
+        # Closing the server ends start_websocket_server()
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
 
     def receive_client_input(self):
+        # Process every input received from the WebSocket client since the last frame
+        while True:
+            try:
+                self.client_input = self.input_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            self.process_client_input()
+
+    def process_client_input(self):
         # Check and process the client input
         if self.client_input is not None:
             print(f"Current client input: {self.client_input}")
-            if self.client_input != self.current_posture:  # Only if posture has changed
-                for i in range(len(self.messages)):
-                    if self.client_input == self.messages[i]:
-                        self.frame_processor.update(i)
-                        self.current_posture = self.client_input  # Update the current posture
-                        break
+            i = self.message_to_index.get(self.client_input)
+            if i is not None and self.client_input != self.current_posture:  # Only if posture has changed
+                self.frame_processor.update(i)
+                self.current_posture = self.client_input  # Update the current posture
         else:
             print("No input from client yet.")
 
-    def receive_key_input_debug(self):
-        self.key_events = pygame.event.get()
-        for event in self.key_events:
+    def receive_key_input_debug(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                for i in range(len(self.keys)):
-                    if event.key == self.keys[i]:
-                        self.frame_processor.update(i)
-                        self.current_posture = self.messages[i]
-                        self.posture_changed.emit(self.current_posture)  # Emit posture change
-                        break
-
-    def handle_key_interruptions(self):
-        self.key_events = pygame.event.get()
-        for event in self.key_events:
+                i = self.key_to_index.get(event.key)
+                if i is not None:
+                    self.frame_processor.update(i)
+                    self.current_posture = self.messages[i]
+                    self.posture_changed.emit(self.messages[i])  # Emit posture change
+
+    def handle_key_interruptions(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
 
     def run(self):
         # Start WebSocket server in a separate thread
-        websocket_thread = threading.Thread(target=self.run_websocket)
+        websocket_thread = threading.Thread(target=self.run_websocket, daemon=True)
         websocket_thread.start()
 
         # Pygame event loop
         while self.running:
 
-            # Check client input and react
-            self.receive_key_input_debug()
+            # Drain the event queue once per frame and dispatch it
+            self.key_events = pygame.event.get()
+
+            # Check client input and react, on this thread as the frame processor is not shared
+            self.receive_client_input()
+            self.receive_key_input_debug(self.key_events)
 
             next_frame = self.frame_processor.get_next_frame()
 
             self.screen.screen_iteration(next_frame)
 
         # Clean up when loop exits
-        websocket_thread.join()
+        self.stop_websocket_server()
+        websocket_thread.join(timeout=1)  # daemon, does not block exit if the server was not up yet
+
+    def stop(self):
+        self.running = False
 
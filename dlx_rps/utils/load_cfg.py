@@ -15,14 +15,10 @@
 # GUI File path
 import os, sys
 import yaml
-
-## tkinter
-import tkinter as tk
-from tkinter.filedialog import askopenfilename
-tk.Tk().withdraw()
-
-## pyqt5
-from PyQt5.QtWidgets import (QFileDialog, QApplication)
+try: # libyaml parser when available
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 # Loger
 from config import DEBUG
@@ -34,19 +30,28 @@ logger = setup_logger(__name__, debug=DEBUG)
 # ---
 def load_yaml_configuration_file():
     """Load experiment configuration file"""
-    # Ask configuration file path
-    if QApplication.instance(): # if qt app running uses Qt
-        fpath_config, _ = QFileDialog.getOpenFileName(
+    # Ask configuration file path, GUI toolkits are only imported when used
+    qt_widgets = sys.modules.get('PyQt5.QtWidgets') # a qt app needs it imported already
+    if qt_widgets and qt_widgets.QApplication.instance(): # if qt app running uses Qt
+        fpath_config, _ = qt_widgets.QFileDialog.getOpenFileName(
             None,
             "Select a YAML file",
             "",
             "YAML files (*.yaml);;All files (*)"
         )
     else: # is not qt app use tkinter
-        fpath_config = askopenfilename(
-            filetypes=[("YAML files", "*.yaml"), ("All files", "*.*")], 
-            defaultextension='.yaml'
-        )
+        import tkinter as tk
+        from tkinter.filedialog import askopenfilename
+
+        root = tk.Tk() # hidden root window only for the dialog
+        root.withdraw()
+        try:
+            fpath_config = askopenfilename(
+                filetypes=[("YAML files", "*.yaml"), ("All files", "*.*")], 
+                defaultextension='.yaml'
+            )
+        finally:
+            root.destroy()
 
     # Check path
     if fpath_config:
@@ -60,7 +65,7 @@ def load_yaml_configuration_file():
         sys.exit()
 
     # Extract parameters
-    with open(fpath_config, 'r', encoding='utf-8') as file:
-        cfg = yaml.safe_load(file)
+    with open(fpath_config, 'rb') as file:
+        cfg = yaml.load(file, Loader=SafeLoader)
 
     return fpath_config, cfg
\ No newline at end of file
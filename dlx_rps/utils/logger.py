@@ -14,22 +14,27 @@
 
 import logging, coloredlogs, sys
 
+_configured = False # root logging is set up once, by the first call
+
 def setup_logger(name, debug=False):
-    # Set up basic configuration
-    if debug:
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            stream=sys.stderr
-        )
-        coloredlogs.install(level=logging.DEBUG)
-    else:
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            stream=sys.stderr
-        )
-        coloredlogs.install()
+    # Set up basic configuration once, coloredlogs.install() reinstalls its handler on every call
+    global _configured
+    if not _configured:
+        if debug:
+            logging.basicConfig(
+                level=logging.DEBUG,
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                stream=sys.stderr
+            )
+            coloredlogs.install(level=logging.DEBUG)
+        else:
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                stream=sys.stderr
+            )
+            coloredlogs.install()
+        _configured = True
 
     # Get logger with given name (module name)
     logger = logging.getLogger(name)
@@ -15,6 +15,7 @@
 import os
 import numpy as np
 from datetime import datetime
+from pathlib import Path
 
 from maxwellio.array import MaxWellElectrodeArray, MockElectrodeArray
 from maxwellio.saving import EmptyLocalSaving, MaxWellLocalSaving
@@ -25,6 +26,7 @@ from utils.logger import setup_logger
 logger = setup_logger(__name__, debug=DEBUG)
 
 _UPDATE_REC_DATE = False
+_REC_DATE_PREFIX = datetime.today().strftime('%Y%m%d_') if _UPDATE_REC_DATE else ''
 
 def init_maxwell_array(fpath_cfg_elec_array):
         """Initialize Maxwell array and stim electrodes"""
@@ -43,9 +45,11 @@ def init_maxwell_array(fpath_cfg_elec_array):
         logger.info("Load electrode array configuration from file:%s", fpath_cfg_elec_array)
 
         # Generate mapping conv channels to electrodes
+        n_mappings = len(cfg.mappings)
+        channels = np.fromiter((m.channel for m in cfg.mappings), dtype=np.int32, count=n_mappings)
+        electrodes = np.fromiter((m.electrode for m in cfg.mappings), dtype=np.int32, count=n_mappings)
         chan2el = np.zeros(MAX_N_SAMPLING_CHANNELS, dtype=np.int32)
-        for mapping in cfg.mappings:
-            chan2el[mapping.channel] = mapping.electrode
+        chan2el[channels] = electrodes
 
         elec_array.download()
         elec_array.offset()
@@ -61,14 +65,12 @@ def init_maxwell_saver(fpath_cfg_file, dirpath_save):
 
     # Save with current date
     if _UPDATE_REC_DATE:
-        fname = datetime.today().strftime('%Y%m%d_') + fname.split('_',1)[1] # update date
+        fname = _REC_DATE_PREFIX + fname.split('_',1)[-1] # update date, whole name if there is no date to replace
 
     fpath_save_no_ext = os.path.join(dirpath_save, fname)
 
     if not DEBUG:
-        with open(fpath_save_no_ext + '.raw.h5', 'w') as f: 
-            f.write(fpath_save_no_ext)
-            f.close()
+        Path(fpath_save_no_ext + '.raw.h5').touch() # empty placeholder, not a text file posing as HDF5
         maxwell_saving = EmptyLocalSaving()
     else:
         maxwell_saving = MaxWellLocalSaving()
@@ -11,6 +11,7 @@ PATTERN_LENGTH = 50
 PATTERN_QUARTER_SHAPE = (PATTERN_LENGTH, HEIGHT // 2, WIDTH // 2)
 
 VOL_BACKGROUND_NOISE = 2
+BACKGROUND_REGEN_INTERVAL = 6  # frames between background noise redraws
 
 # Define colors
 WHITE = (255, 255, 255)
@@ -24,19 +25,14 @@ PULSE_SPEED = 0.3
 CHOSEN_PATTERN = PULSE
 
 
+# Top-left corner of each quadrant, looked up instead of branching on every call
+QUARTER_LOCATIONS = {
+    1: (WIDTH // 2, 0),  # Top-right
+    2: (0, 0),  # Top-left
+    3: (WIDTH // 2, HEIGHT // 2),  # Bottom-right
+    4: (0, HEIGHT // 2),  # Bottom-left
+}
+
+
 def calc_quarter_location(quadrant):
-    if quadrant == 1:  # Top-right
-        x = WIDTH // 2
-        y = 0
-    elif quadrant == 2:  # Top-left
-        x = 0
-        y = 0
-    elif quadrant == 3:  # Bottom-right
-        x = WIDTH // 2
-        y = HEIGHT // 2
-    elif quadrant == 4:  # Bottom-left
-        x = 0
-        y = HEIGHT // 2
-    else:
-        return
-    return x, y
+    return QUARTER_LOCATIONS.get(quadrant)
@@ -1,46 +1,124 @@
 import numpy as np
-import noise
+
+# Improved Perlin noise tables (same as the `noise` package C implementation)
+_PERM = np.array([
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140,
+    36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247, 120,
+    234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177, 33,
+    88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71,
+    134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122, 60, 211, 133,
+    230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25, 63, 161,
+    1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130,
+    116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64, 52, 217, 226, 250,
+    124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212, 207, 206, 59, 227,
+    47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213, 119, 248, 152, 2, 44,
+    154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9, 129, 22, 39, 253, 19, 98,
+    108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246, 97, 228, 251, 34,
+    242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14,
+    239, 107, 49, 192, 214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121,
+    50, 45, 127, 4, 150, 254, 138, 236, 205, 93, 222, 114, 67, 29, 24, 72, 243,
+    141, 128, 195, 78, 66, 215, 61, 156, 180,
+] * 2, dtype=np.intp)
+
+_GRAD3_X, _GRAD3_Y, _GRAD3_Z = np.array([
+    (1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0),
+    (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1),
+    (0, 1, 1), (0, -1, 1), (0, 1, -1), (0, -1, -1),
+    (1, 0, -1), (-1, 0, -1), (0, -1, 1), (0, 1, 1),
+], dtype=np.float32).T
+
+
+_rng = np.random.default_rng()
 
 
 def generate_random(shape, min_value=0, max_value=1, step=0.1):
-    return np.random.choice(np.arange(min_value, max_value + step, step), size=shape)
+    # Draw the index of one of the evenly spaced values directly, instead of choosing from an arange
+    n_values = int(np.ceil((max_value + step - min_value) / step))
+    random_array = _rng.integers(n_values, size=shape).astype(np.float32)
+    random_array *= step
+    random_array += min_value
+    return random_array
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def _grad3(hash_value, x, y, z):
+    h = hash_value & 15
+    return x * _GRAD3_X[h] + y * _GRAD3_Y[h] + z * _GRAD3_Z[h]
+
+
+def _perlin_noise_3d(x, y, z, repeat, base=0):
+    # Single octave of improved Perlin noise evaluated on whole coordinate arrays
+    i = np.floor(np.fmod(x, repeat)).astype(np.intp)
+    j = np.floor(np.fmod(y, repeat)).astype(np.intp)
+    k = np.floor(np.fmod(z, repeat)).astype(np.intp)
+    ii = (np.fmod(i + 1, repeat) & 255) + base
+    jj = (np.fmod(j + 1, repeat) & 255) + base
+    kk = (np.fmod(k + 1, repeat) & 255) + base
+    i = (i & 255) + base
+    j = (j & 255) + base
+    k = (k & 255) + base
+
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    z = z - np.floor(z)
+    fx, fy, fz = _fade(x), _fade(y), _fade(z)
+
+    a = _PERM[i]
+    aa = _PERM[a + j]
+    ab = _PERM[a + jj]
+    b = _PERM[ii]
+    ba = _PERM[b + j]
+    bb = _PERM[b + jj]
+
+    return _lerp(fz, _lerp(fy, _lerp(fx, _grad3(_PERM[aa + k], x, y, z),
+                                         _grad3(_PERM[ba + k], x - 1, y, z)),
+                               _lerp(fx, _grad3(_PERM[ab + k], x, y - 1, z),
+                                         _grad3(_PERM[bb + k], x - 1, y - 1, z))),
+                     _lerp(fy, _lerp(fx, _grad3(_PERM[aa + kk], x, y, z - 1),
+                                         _grad3(_PERM[ba + kk], x - 1, y, z - 1)),
+                               _lerp(fx, _grad3(_PERM[ab + kk], x, y - 1, z - 1),
+                                         _grad3(_PERM[bb + kk], x - 1, y - 1, z - 1))))
 
 
 def generate_perlin_noise_3d(shape, scale=0.1, octaves=6, persistence=0.5, lacunarity=2.0, seed=None):
     if seed:
         np.random.seed(seed)
-    noise_array = np.zeros(shape)
-
-    for x in range(shape[0]):
-        for y in range(shape[1]):
-            for z in range(shape[2]):
-                noise_array[x][y][z] = noise.pnoise3(
-                    x * scale,
-                    y * scale,
-                    z * scale,
-                    octaves=octaves,
-                    persistence=persistence,
-                    lacunarity=lacunarity,
-                    repeatx=1024,
-                    repeaty=1024,
-                    repeatz=1024,
-                    base=0
-                )
-
-    # Normalize the values to be between 0 and 1
-    min_val = np.min(noise_array)
-    max_val = np.max(noise_array)
+
+    # Scaled coordinates of every voxel, broadcast against each other
+    # (z first so that each z-slice of the returned volume is contiguous in memory)
+    z, x, y = np.ogrid[:shape[2], :shape[0], :shape[1]]
+    x, y, z = (x * scale).astype(np.float32), (y * scale).astype(np.float32), (z * scale).astype(np.float32)
+
+    # Sum octaves over the whole grid at once (fBm, as noise.pnoise3 does). The division by the
+    # total amplitude is skipped since it cancels out in the normalization below
+    noise_array = np.zeros((shape[2], shape[0], shape[1]), dtype=np.float32)
+    frequency = 1.0
+    amplitude = 1.0
+    for _ in range(octaves):
+        noise_array += amplitude * _perlin_noise_3d(x * frequency, y * frequency, z * frequency,
+                                                    int(1024 * frequency))
+        frequency *= lacunarity
+        amplitude *= persistence
+
+    # Normalize the values to be between 0 and 1 (in place)
+    min_val = noise_array.min()
+    max_val = noise_array.max()
 
     if max_val != min_val:
-        noise_array = (noise_array - min_val) / (max_val - min_val)
+        noise_array -= min_val
+        noise_array *= 1 / (max_val - min_val)
 
-    return noise_array
+    return noise_array.transpose(1, 2, 0)
 
 
 def generate_pulse(shape, first_circle_size=0.1, last_circle_size=0.9,  first_intensity=0, last_intensity=255, organic_growth=True):
-    # Start with a white background (255 for full brightness)
-    pulse_array = np.ones(shape) * 255
-
     center_x = shape[0] // 2
     center_y = shape[1] // 2
 
@@ -59,26 +137,25 @@ def generate_pulse(shape, first_circle_size=0.1, last_circle_size=0.9,  first_in
     def circle_intensity_step(z_index, z_max):
         return first_intensity + (last_intensity - first_intensity) * (z_index / z_max)
 
-    # Loop over z_dim to create multiple circles for each "time" slice
-    for z in range(shape[2]):
-        for i in range(z + 1):  # Ensures every previous circle is included in every subsequent frame
-            # Calculate radius for each circle using the custom growth function
-            radius = circle_radius_step(i, shape[2]) * max_radius
+    # Radius and intensity of the circle added at each "time" slice
+    z_indices = np.arange(shape[2])
+    radii = circle_radius_step(z_indices, shape[2]) * max_radius
+    intensities = np.minimum(circle_intensity_step(z_indices, shape[2]), 255).astype(np.float32)
 
-            # Calculate the intensity of each circle using a linear interpolation
-            intensity = circle_intensity_step(i, shape[2])
+    # Squared distance of every pixel from the center, computed once (no sqrt needed to compare with radii)
+    x, y = np.ogrid[:shape[0], :shape[1]]
+    distance_squared = (x - center_x) ** 2 + (y - center_y) ** 2
 
-            # Draw each circle in every frame
-            for x in range(shape[0]):
-                for y in range(shape[1]):
-                    distance = np.hypot(x - center_x, y - center_y)
+    # Draw each circle alone on a white background (255 for full brightness)
+    circles = np.where(distance_squared <= (radii ** 2)[:, None, None], intensities[:, None, None], np.float32(255))
 
-                    # For pixels inside the current radius, set the intensity
-                    if distance <= radius:
-                        pulse_array[x, y, z] = min(pulse_array[x, y, z], intensity)
+    # Running minimum over z ensures every previous circle is included in every subsequent frame
+    # (computed z-major, so each z-slice of the returned volume is contiguous in memory)
+    np.minimum.accumulate(circles, axis=0, out=circles)
+    pulse_array = circles.transpose(1, 2, 0)
 
     # Normalize the pulse array between 0 and 1 for proper display
-    pulse_array = pulse_array / 255.0
+    pulse_array /= 255
     return pulse_array
 
 
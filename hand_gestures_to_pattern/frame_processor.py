@@ -1,3 +1,4 @@
+import numpy as np
 from hand_gestures_to_pattern import args, patterns_generator
 
 class FrameProcessor:
@@ -8,24 +9,36 @@ class FrameProcessor:
         self.frame_index = 0
         self.burst_active = False
         self.active_quadrant = 0
+        self.location = None
+        self.n_burst_frames = 0
         self.constant_pattern_array = patterns_generator.generate_patten_array(args.CHOSEN_PATTERN,
                                                                                args.PATTERN_QUARTER_SHAPE)
+        # Decorative background noise, regenerated every BACKGROUND_REGEN_INTERVAL frames
+        self.frame_count = 0
+        self.background = patterns_generator.generate_background_2d((args.WIDTH, args.HEIGHT))
+        self.frame = np.empty_like(self.background)
 
     def update(self, input_key):
         self.burst_array = self.constant_pattern_array
-        self.burst_active = True
         self.frame_index = 0
         self.active_quadrant = input_key + 1
+        # Fixed for the whole burst, resolved once instead of every frame
+        self.location = args.calc_quarter_location(self.active_quadrant)
+        self.n_burst_frames = len(self.burst_array)
+        self.burst_active = True  # Last, once the burst state above is complete
 
     def get_next_frame(self):
-        background = patterns_generator.generate_background_2d((args.WIDTH, args.HEIGHT))
+        if self.frame_count % args.BACKGROUND_REGEN_INTERVAL == 0:
+            self.background = patterns_generator.generate_background_2d((args.WIDTH, args.HEIGHT))
+        self.frame_count += 1
+        # Reuse one frame buffer, the screen consumes it before the next call
+        background = self.frame
+        np.copyto(background, self.background)
 
         if self.burst_active:
-            location = args.calc_quarter_location(self.active_quadrant)
             # Blit the pattern into the specified location on the small screen
-            patterns_generator.insert_2d_subarray(background, self.burst_array[self.frame_index], location)
+            patterns_generator.insert_2d_subarray(background, self.burst_array[self.frame_index], self.location)
             self.frame_index += 1
-            if self.frame_index >= len(self.burst_array):
-                self.burst_active = False  # End the animation after all frames are shown
+            self.burst_active = self.frame_index < self.n_burst_frames  # End after all frames are shown
 
         return background
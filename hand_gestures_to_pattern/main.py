@@ -1,6 +1,5 @@
-import asyncio
 import web_stream
 
 if __name__ == '__main__':
     server = web_stream.WebSocketServer()
-    asyncio.run(server.run())
+    server.run()
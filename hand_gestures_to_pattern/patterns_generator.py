@@ -1,40 +1,124 @@
 import numpy as np
-import noise
 from hand_gestures_to_pattern import args
-import random
+from functools import lru_cache
+
+# Improved Perlin noise tables (same as the `noise` package C implementation)
+_PERM = np.array([
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140,
+    36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247, 120,
+    234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177, 33,
+    88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71,
+    134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122, 60, 211, 133,
+    230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25, 63, 161,
+    1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130,
+    116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64, 52, 217, 226, 250,
+    124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212, 207, 206, 59, 227,
+    47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213, 119, 248, 152, 2, 44,
+    154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9, 129, 22, 39, 253, 19, 98,
+    108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246, 97, 228, 251, 34,
+    242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14,
+    239, 107, 49, 192, 214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121,
+    50, 45, 127, 4, 150, 254, 138, 236, 205, 93, 222, 114, 67, 29, 24, 72, 243,
+    141, 128, 195, 78, 66, 215, 61, 156, 180,
+] * 2, dtype=np.intp)
+
+_GRAD3_X, _GRAD3_Y, _GRAD3_Z = np.array([
+    (1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0),
+    (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1),
+    (0, 1, 1), (0, -1, 1), (0, 1, -1), (0, -1, -1),
+    (1, 0, -1), (-1, 0, -1), (0, -1, 1), (0, 1, 1),
+], dtype=np.float32).T
 
 
 def generate_random_pattern(shape, min_value=0, max_value=256, step=255):
-    return np.random.choice(np.arange(min_value, max_value + step, step), size=shape)
+    # Draw level indices directly instead of sampling from an arange with np.random.choice
+    n_levels = len(np.arange(min_value, max_value + step, step))  # Same levels as before, floats included
+    return min_value + step * np.random.randint(0, n_levels, size=shape)
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def _grad3(hash_value, x, y, z):
+    h = hash_value & 15
+    return x * _GRAD3_X.take(h) + y * _GRAD3_Y.take(h) + z * _GRAD3_Z.take(h)
+
+
+def _perlin_noise_3d(x, y, z, repeat, base=0):
+    # Single octave of improved Perlin noise evaluated on whole coordinate arrays
+    i = np.floor(np.fmod(x, repeat)).astype(np.intp)
+    j = np.floor(np.fmod(y, repeat)).astype(np.intp)
+    k = np.floor(np.fmod(z, repeat)).astype(np.intp)
+    ii = (np.fmod(i + 1, repeat) & 255) + base
+    jj = (np.fmod(j + 1, repeat) & 255) + base
+    kk = (np.fmod(k + 1, repeat) & 255) + base
+    i = (i & 255) + base
+    j = (j & 255) + base
+    k = (k & 255) + base
+
+    # Fractional parts in float32, as the C implementation computes
+    x = (x - np.floor(x)).astype(np.float32)
+    y = (y - np.floor(y)).astype(np.float32)
+    z = (z - np.floor(z)).astype(np.float32)
+    x1, y1, z1 = x - 1, y - 1, z - 1
+    fx, fy, fz = _fade(x), _fade(y), _fade(z)
+
+    perm = _PERM
+    a = perm.take(i)
+    aa = perm.take(a + j)
+    ab = perm.take(a + jj)
+    b = perm.take(ii)
+    ba = perm.take(b + j)
+    bb = perm.take(b + jj)
+
+    return _lerp(fz, _lerp(fy, _lerp(fx, _grad3(perm.take(aa + k), x, y, z),
+                                         _grad3(perm.take(ba + k), x1, y, z)),
+                               _lerp(fx, _grad3(perm.take(ab + k), x, y1, z),
+                                         _grad3(perm.take(bb + k), x1, y1, z))),
+                     _lerp(fy, _lerp(fx, _grad3(perm.take(aa + kk), x, y, z1),
+                                         _grad3(perm.take(ba + kk), x1, y, z1)),
+                               _lerp(fx, _grad3(perm.take(ab + kk), x, y1, z1),
+                                         _grad3(perm.take(bb + kk), x1, y1, z1))))
 
 
 def generate_perlin_noise_3d(shape, scale=0.1, octaves=6, persistence=0.5, lacunarity=2.0, seed=None):
     if seed:
         np.random.seed(seed)
-    noise_array = np.zeros(shape)
-
-    for x in range(shape[0]):
-        for y in range(shape[1]):
-            for z in range(shape[2]):
-                noise_array[x][y][z] = noise.pnoise3(
-                    x * scale,
-                    y * scale,
-                    z * scale,
-                    octaves=octaves,
-                    persistence=persistence,
-                    lacunarity=lacunarity,
-                    repeatx=8,
-                    repeaty=8,
-                    repeatz=8,
-                    base=0
-                )
-
-    # Normalize the values to be between 0 and 1
+
+    # Scaled coordinates of every voxel, broadcast against each other instead of one
+    # noise.pnoise3 call per voxel
+    x, y, z = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    x, y, z = x * scale, y * scale, z * scale
+
+    # Sum octaves over the whole grid at once, as noise.pnoise3 does with repeat=8 on each axis.
+    # The division by the total amplitude is skipped since it cancels out in the normalization below
+    noise_array = None
+    frequency = 1.0
+    amplitude = 1.0
+    for _ in range(octaves):
+        octave = _perlin_noise_3d(x * frequency, y * frequency, z * frequency, int(8 * frequency))
+        octave *= amplitude
+        if noise_array is None:
+            noise_array = octave  # The first octave's fresh buffer becomes the sum, no zero fill
+        else:
+            noise_array += octave
+        frequency *= lacunarity
+        amplitude *= persistence
+    if noise_array is None:
+        noise_array = np.zeros(shape, dtype=np.float32)
+
+    # Normalize the values to be between 0 and 1, in place to skip the full-size temporaries
     min_val = np.min(noise_array)
     max_val = np.max(noise_array)
 
     if max_val != min_val:
-        noise_array = (noise_array - min_val) / (max_val - min_val)
+        noise_array -= min_val
+        noise_array /= max_val - min_val
 
     noise_array *= 255
     return noise_array
@@ -46,10 +130,11 @@ def insert_2d_subarray(large_array, small_array, position):
 
 
 def generate_background_2d(shape):
-    background = np.ones(shape) * args.WHITE[0]
-    for _ in range(args.VOL_BACKGROUND_NOISE):  # Add random black pixels
-        x, y = random.randint(0, args.WIDTH - 1), random.randint(0, args.HEIGHT - 1)
-        background[x, y] = args.BLACK[0]
+    background = np.full(shape, args.WHITE[0], dtype=np.uint8)  # Same dtype as the surface pixels
+    # Add random black pixels, all drawn at once
+    x = np.random.randint(0, args.WIDTH, size=args.VOL_BACKGROUND_NOISE)
+    y = np.random.randint(0, args.HEIGHT, size=args.VOL_BACKGROUND_NOISE)
+    background[x, y] = args.BLACK[0]
     return background
 
 
@@ -58,29 +143,25 @@ def white_background(shape):
 
 
 def create_pulse_animation_array(shape, pulse_speed):
-    animation_array = np.zeros(shape,
-                               dtype=np.uint8)  # 3D numpy array for (frames, height, width)
-
     # Maximum radius is half of the smallest dimension
     max_radius = min(shape[1], shape[2]) // 2
     center = (shape[1] // 2, shape[2] // 2)
 
-    # Precompute distances for all points from the center
+    # Precompute squared distances for all points from the center, so no sqrt is needed
     y, x = np.ogrid[:shape[1], :shape[2]]
-    distance_from_center = np.sqrt((x - center[1]) ** 2 + (y - center[0]) ** 2)
-
-    # For each frame, calculate the pulse and brightness
-    for frame in range(shape[0]):
-        radius = pulse_speed * frame
-        radius = min(radius, max_radius)  # Cap the radius at max_radius
-        brightness = int(255 * (radius / max_radius))  # Brightness grows as radius grows
+    squared_distance = (x - center[1]) ** 2 + (y - center[0]) ** 2
 
-        # Fill the frame with brightness where distance <= radius
-        animation_array[frame] = np.where(distance_from_center <= radius, brightness, 255)
+    # Pulse radius and brightness of every frame at once
+    radii = np.minimum(pulse_speed * np.arange(shape[0]), max_radius)  # Cap the radius at max_radius
+    brightness = (255 * (radii / max_radius)).astype(np.uint8)  # Brightness grows as radius grows
 
-    return animation_array
+    # Fill each frame with brightness where distance <= radius, in one (frames, height, width) pass
+    return np.where(squared_distance <= (radii ** 2)[:, None, None], brightness[:, None, None], np.uint8(255))
 
 
+# Memoized: every FrameProcessor asks for the same constant pattern,
+# so it is generated once per session. The array is read-only, copy it before modifying it
+@lru_cache(maxsize=8)
 def generate_patten_array(pattern_type, shape):
     pattern = []
     if pattern_type == args.RANDOM:
@@ -89,4 +170,8 @@ def generate_patten_array(pattern_type, shape):
         pattern = generate_perlin_noise_3d(shape)
     if pattern_type == args.PULSE:
         pattern = create_pulse_animation_array(shape, args.PULSE_SPEED)
+    if isinstance(pattern, np.ndarray):
+        # One contiguous block in the frame pixel dtype, so inserting a frame is a plain copy
+        pattern = np.ascontiguousarray(pattern, dtype=np.uint8)
+        pattern.setflags(write=False)
     return pattern
@@ -1,5 +1,5 @@
 import pygame
-from hand_gestures_to_pattern import args, patterns_generator
+from hand_gestures_to_pattern import args
 import numpy as np
 
 
@@ -18,37 +18,45 @@ class PygameScreen:
         self.clock = pygame.time.Clock()
 
         # Create a smaller surface to draw the original 32x32 content
-        self.pixels_screen = pygame.Surface((args.WIDTH, args.HEIGHT))
+        # in the display pixel format so scaling into the window takes the fast path
+        self.pixels_screen = pygame.Surface((args.WIDTH, args.HEIGHT)).convert()
+        # Last presented frame, to only push the changed region to the window
+        self.last_frame = None
 
-        # Main loop setup:
+        # Main loop setup, bursts are composited into the frame by FrameProcessor:
         self.running = True
-        self.burst_array = []
-        self.frame_index = 0
-        self.burst_active = False
-        self.active_quadrant = 0
-        self.constant_pattern_array = patterns_generator.generate_patten_array(args.CHOSEN_PATTERN, args.PATTERN_QUARTER_SHAPE)
-
-    def update_by_input(self, i):
-        self.burst_array = self.constant_pattern_array
-        self.burst_active = True
-        self.frame_index = 0
-        self.active_quadrant = i + 1
 
     def screen_iteration(self, frame_data):
 
-        surface = pygame.Surface((args.WIDTH, args.HEIGHT))
-
-        pygame.surfarray.blit_array(surface, np.stack([frame_data] * 3, axis=-1))
-
-        # # Generate random black dots as background
-        self.pixels_screen.blit(surface, (0, 0))
+        # Write the grayscale frame straight into the surface pixels, broadcast over RGB
+        pixels = pygame.surfarray.pixels3d(self.pixels_screen)
+        pixels[...] = frame_data[..., np.newaxis]
+        del pixels  # Release the surface lock before scaling
+
+        # Scale up only the part that changed since the last frame, straight into the window surface
+        scale = args.SCALE_SCREEN
+        scaled_rects = []
+        for rect in self.dirty_rects(frame_data):
+            scaled_rect = pygame.Rect(rect.x * scale, rect.y * scale, rect.width * scale, rect.height * scale)
+            pygame.transform.scale(self.pixels_screen.subsurface(rect), scaled_rect.size,
+                                   self.view_screen.subsurface(scaled_rect))
+            scaled_rects.append(scaled_rect)
+
+        # Update the display where it was redrawn
+        pygame.display.update(scaled_rects)
+        self.clock.tick(self.fps)  # Limit the frame rate to the specified FPS
 
-        # Scale up the small screen to the larger window
-        scaled_screen = pygame.transform.scale(self.pixels_screen, args.SCALED_SIZE)
+    def dirty_rects(self, frame_data):
+        if self.last_frame is None:
+            self.last_frame = np.array(frame_data)
+            return [self.pixels_screen.get_rect()]  # Prime the whole window on the first frame
 
-        # Blit the scaled surface to the actual screen
-        self.view_screen.blit(scaled_screen, (0, 0))
+        changed = frame_data != self.last_frame
+        xs = np.flatnonzero(changed.any(axis=1))
+        if xs.size == 0:
+            return []
+        ys = np.flatnonzero(changed.any(axis=0))
+        np.copyto(self.last_frame, frame_data)
 
-        # Update the display
-        pygame.display.flip()
-        self.clock.tick(self.fps)  # Limit the frame rate to the specified FPS
+        # Bounding box of the changed pixels
+        return [pygame.Rect(xs[0], ys[0], xs[-1] - xs[0] + 1, ys[-1] - ys[0] + 1)]
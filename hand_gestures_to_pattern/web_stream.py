@@ -1,4 +1,6 @@
 import asyncio
+import queue
+import threading
 import websockets
 from pygame_screen import PygameScreen
 from frame_processor import FrameProcessor
@@ -13,8 +15,10 @@ class WebSocketServer:
         self.host = host
         self.port = port
         self.client_input = None  # Store input from the WebSocket client
+        self.input_queue = queue.SimpleQueue()  # Client messages, from the asyncio thread to the screen loop
         self.current_posture = None  # Track the current posture
         self.server = None
+        self.loop = None  # asyncio loop serving the WebSocket
         self.screen = PygameScreen()
         self.frame_processor = FrameProcessor()
         self.messages = ["rock", "paper", "scissors"]
@@ -26,7 +30,7 @@ class WebSocketServer:
         try:
             async for message in websocket:
                 print(f"Received message: {message}")
-                self.client_input = message  # Store the input from the WebSocket client
+                self.input_queue.put(message)  # Hand the input over to the screen loop
         except websockets.ConnectionClosed:
             print("Client disconnected")
 
@@ -36,7 +40,21 @@ class WebSocketServer:
         print(f"WebSocket server started on {self.host}:{self.port}")
         await self.server.wait_closed()  # Keeps the server running
 
-    async def debug_react(self):
+    def run_websocket(self):
+        # Own event loop on a background thread, so that pygame stays on the thread that created the window
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.start_websocket_server())
+        finally:
+            self.loop.close()
+
+    def stop_websocket_server(self):
+        # Closing the server ends start_websocket_server()
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    def debug_react(self):
         print("debug_react")
         for event in self.key_events:
             if event.type == pygame.KEYDOWN:
@@ -46,7 +64,14 @@ class WebSocketServer:
                         self.current_posture = self.messages[i]  # Update the current posture
                         break
 
-    async def check_input(self):
+    def check_input(self):
+        # Keep the latest input received from the WebSocket client
+        while True:
+            try:
+                self.client_input = self.input_queue.get_nowait()
+            except queue.Empty:
+                break
+
         # Check and process the client input
         if self.client_input is not None:
             print(f"Current client input: {self.client_input}")
@@ -58,12 +83,10 @@ class WebSocketServer:
                         break
         else:
             print("No input from client yet.")
-            await self.debug_react()
-
-        await asyncio.sleep(0)  # Yield control to allow other tasks to run
+            self.debug_react()
 
-    # Main loop to process client input and render animation
-    async def screen_loop(self):
+    # Main loop to process client input and render animation, on the main thread with the window
+    def screen_loop(self):
         while self.screen.running:
 
             # Handle Pygame events (this prevents freezing)
@@ -72,17 +95,20 @@ class WebSocketServer:
                 if event.type == pygame.QUIT:
                     self.screen.running = False
 
-            await self.check_input()
+            self.check_input()
 
             next_frame = self.frame_processor.get_next_frame()
             self.screen.screen_iteration(next_frame)
 
 
     # Main function to run both the WebSocket server and the screen loop concurrently
-    async def run(self):
-        # Start WebSocket server and screen loop concurrently
-        await asyncio.gather(
-            self.start_websocket_server(),
-            self.screen_loop()
-        )
+    def run(self):
+        # Start WebSocket server in a separate thread, the screen loop keeps the calling thread
+        websocket_thread = threading.Thread(target=self.run_websocket, daemon=True)
+        websocket_thread.start()
+
+        self.screen_loop()
 
+        # Screen closed, shut the server down
+        self.stop_websocket_server()
+        websocket_thread.join(timeout=1)  # daemon, does not block exit if the server was not up yet